@@ -0,0 +1,110 @@
+"""Compare JSON serialization cost per endpoint before and after the orjson response class.
+
+    cd backend && python bench_json.py [--rounds 200]
+
+"before" is what FastAPI did for a plain dict/list return value (jsonable_encoder followed by
+Starlette's stdlib json render), "after" is the path each endpoint takes now. Payloads are
+synthetic documents shaped like the real collections, so no database is needed.
+"""
+import argparse
+import json
+import os
+import timeit
+import uuid
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "bench")
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+import server  # noqa: E402
+
+
+def stdlib_response(content) -> bytes:
+    # starlette.responses.JSONResponse.render
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def before(content) -> bytes:
+    return stdlib_response(jsonable_encoder(content))
+
+
+def after_direct(content) -> bytes:
+    # Handlers that return FastJSONResponse(docs) themselves
+    return server.dumps_json(content)
+
+
+def after_default(content) -> bytes:
+    # Plain return values still pass through jsonable_encoder, then orjson renders them
+    return server.dumps_json(jsonable_encoder(content))
+
+
+def bookings(count: int) -> list:
+    now = datetime.now(timezone.utc)
+    return [{
+        "id": str(uuid.uuid4()),
+        "full_name": f"Client {i}",
+        "email": f"client{i}@example.com",
+        "phone": "+91 9000000000",
+        "service_id": str(uuid.uuid4()),
+        "service_name": "Mixing",
+        "description": "Mix and master a five track EP with stems for each vocal take. " * 2,
+        "hours": 3,
+        "preferred_date": (now + timedelta(days=i % 30)).date().isoformat(),
+        "status": "pending",
+        "created_at": (now - timedelta(minutes=i)).isoformat(),
+    } for i in range(count)]
+
+
+def applications(count: int) -> list:
+    now = datetime.now(timezone.utc)
+    return [{
+        "id": str(uuid.uuid4()),
+        "name": f"Applicant {i}",
+        "email": f"applicant{i}@example.com",
+        "phone": "+91 9000000000",
+        "city": "Chennai",
+        "position_type": "intern" if i % 2 else "engineer",
+        "note": "Two years of live sound and post-production experience. " * 3,
+        "portfolio_url": "https://example.com/portfolio",
+        "cv_filename": f"cv_{uuid.uuid4().hex}.pdf",
+        "status": "new",
+        "created_at": (now - timedelta(hours=i)).isoformat(),
+    } for i in range(count)]
+
+
+# endpoint -> (payload, path it takes now)
+ENDPOINTS = {
+    "GET /bookings (1000)": (bookings(1000), after_direct),
+    "GET /bookings/user (100)": (bookings(100), after_direct),
+    "GET /applications (200)": (applications(200), after_direct),
+    "GET /settings/content": (server.DEFAULT_SITE_CONTENT, after_direct),
+    "GET /services": (server.DEFAULT_SERVICES, after_direct),
+    "GET /projects": (server.DEFAULT_PROJECTS, after_direct),
+    "GET /admin/list": ([{"id": str(uuid.uuid4()), "name": "Admin", "email": f"a{i}@example.com", "access_level": "basic", "suspended": False} for i in range(20)], after_default),
+}
+
+
+def measure(func, payload, rounds: int) -> float:
+    # Best of five runs, in microseconds per call
+    return min(timeit.repeat(lambda: func(payload), number=rounds, repeat=5)) / rounds * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'endpoint':<28} {'bytes':>8} {'before µs':>10} {'after µs':>10} {'speedup':>8}")
+    for name, (payload, after) in ENDPOINTS.items():
+        assert json.loads(before(payload)) == json.loads(after(payload)), name
+        old = measure(before, payload, args.rounds)
+        new = measure(after, payload, args.rounds)
+        print(f"{name:<28} {len(after(payload)):>8} {old:>10.1f} {new:>10.1f} {old / new:>7.1f}x")
+    # The public content endpoints normally skip serialization entirely and serve cached bytes
+    server.client.close()
+
+
+if __name__ == "__main__":
+    main()
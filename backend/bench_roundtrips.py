@@ -0,0 +1,118 @@
+"""Count MongoDB round trips per mutating endpoint.
+
+    cd backend && MONGO_URL=mongodb://localhost:27017 python bench_roundtrips.py
+
+Needs a running MongoDB; everything is written to a throwaway database (DB_NAME, default
+"bench_roundtrips") that is dropped afterwards. Each request is driven in-process and every
+command the driver sends while it runs is recorded with a pymongo command listener. Emails
+and rate limiting are switched off so only the handler's own database work is counted.
+"""
+import asyncio
+import os
+import uuid
+from collections import defaultdict
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "bench_roundtrips")
+
+import httpx  # noqa: E402
+from motor.motor_asyncio import AsyncIOMotorClient  # noqa: E402
+from pymongo import monitoring  # noqa: E402
+
+import server  # noqa: E402
+
+# Round trips each endpoint made before the handlers stopped reading back what they wrote
+BEFORE = {
+    "PUT /settings/contact": 2,
+    "PUT /settings/content": 2,
+    "PUT /settings/site": 2,
+    "POST /services": 2,
+    "PUT /services/{id}": 2,
+    "POST /projects": 2,
+    "PUT /projects/{id}": 2,
+    "POST /bookings": 2,
+    "PUT /bookings/{id}/status": 2,
+}
+
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.commands = []
+
+    def started(self, event):
+        self.commands.append(event.command_name)
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+async def noop_email(*args, **kwargs):
+    return None
+
+
+async def run():
+    counter = CommandCounter()
+    client = AsyncIOMotorClient(os.environ["MONGO_URL"], event_listeners=[counter])
+    server.db = client[os.environ["DB_NAME"]]
+    server.RATE_LIMIT_ENABLED = False
+    server.send_email = noop_email
+    await server.seed_default_data()
+
+    admin_id = str(uuid.uuid4())
+    token = server.create_token({
+        "admin_id": admin_id,
+        "email": server.SUPER_ADMIN_EMAIL,
+        "role": "admin",
+        "access_level": "super",
+        "ver": server.current_token_version(f"admin:{admin_id}"),
+    })
+    headers = {"Authorization": f"Bearer {token}"}
+    transport = httpx.ASGITransport(app=server.app)
+    results = {}
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench/api", headers=headers) as http:
+        async def measure(name, method, path, body):
+            counter.commands.clear()
+            response = await http.request(method, path, json=body)
+            response.raise_for_status()
+            results[name] = list(counter.commands)
+            return response.json()
+
+        await measure("PUT /settings/contact", "PUT", "/settings/contact", {"phone": "+91 9000000000"})
+        await measure("PUT /settings/content", "PUT", "/settings/content", {"hero_title": "Bench"})
+        await measure("PUT /settings/site", "PUT", "/settings/site", {"hero_title": "Bench"})
+        service = await measure("POST /services", "POST", "/services", {"name": "Bench service", "description": "Round trip count"})
+        await measure("PUT /services/{id}", "PUT", f"/services/{service['id']}", {"price": "100"})
+        project = await measure("POST /projects", "POST", "/projects", {"name": "Bench project", "description": "Round trip count", "work_type": "Mixing", "image_url": "https://example.com/cover.jpg"})
+        await measure("PUT /projects/{id}", "PUT", f"/projects/{project['id']}", {"featured": False})
+        booking = await measure("POST /bookings", "POST", "/bookings", {
+            "full_name": "Bench Client",
+            "email": "bench@example.com",
+            "phone": "+91 9000000000",
+            "service_id": service["id"],
+            "service_name": service["name"],
+            "description": "Round trip count",
+            "preferred_date": "2030-01-01",
+            "preferred_time": "10:00",
+        })
+        booking = booking["booking"]
+        await measure("PUT /bookings/{id}/status", "PUT", f"/bookings/{booking['id']}/status", {"status": "confirmed"})
+
+    totals = defaultdict(int)
+    print(f"{'endpoint':<28} {'before':>6} {'after':>6}  commands")
+    for name, commands in results.items():
+        totals["before"] += BEFORE[name]
+        totals["after"] += len(commands)
+        print(f"{name:<28} {BEFORE[name]:>6} {len(commands):>6}  {', '.join(commands)}")
+    print(f"{'total':<28} {totals['before']:>6} {totals['after']:>6}")
+
+    await client.drop_database(os.environ["DB_NAME"])
+    client.close()
+    server.client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
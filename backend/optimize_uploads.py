@@ -0,0 +1,25 @@
+"""Re-optimize the stored uploads backlog from the command line.
+
+    cd backend && python optimize_uploads.py
+
+Uses the same settings (.env, UPLOAD_STORAGE, OPTIMIZE_WORKERS) as the API and
+prints the bytes saved per file. Interrupted runs resume where they stopped.
+"""
+import asyncio
+
+import server
+
+
+async def main():
+    report = await server.optimize_uploads_backlog()
+    for f in report["files"]:
+        if "error" in f:
+            print(f"{f['filename']}: failed ({f['error']})")
+        else:
+            print(f"{f['filename']}: {f['before']} -> {f['after']} bytes (saved {f['saved']})")
+    print(f"{report['processed']} files processed, {report['failed']} failed, {report['bytes_saved']} bytes saved")
+    server.client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,11 +1,17 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, UploadFile, File
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, UploadFile, File, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, Response, StreamingResponse, RedirectResponse, JSONResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import ClientDisconnect
+from starlette.routing import Mount
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument, IndexModel, ASCENDING, DESCENDING, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
 import os
+import orjson
 import logging
 import asyncio
 from pathlib import Path
@@ -16,8 +22,30 @@ from datetime import datetime, timezone, timedelta
 import jwt
 import bcrypt
 import resend
-import random
 import string
+import re
+from contextlib import asynccontextmanager
+from cachetools import LRUCache, TTLCache
+import hashlib
+import hmac
+import secrets
+import math
+import base64
+import mimetypes
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import parse_qs
+import anyio
+import io
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import time
+import threading
+from PIL import Image, ImageOps, UnidentifiedImageError
+try:
+    from pillow_heif import register_heif_opener
+    register_heif_opener()
+    HEIF_SUPPORTED = True
+except ImportError:
+    HEIF_SUPPORTED = False
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -40,8 +68,24 @@ ADMIN_PHONE = os.environ.get('ADMIN_PHONE', '9600130807')
 JWT_SECRET = os.environ.get('JWT_SECRET', 'hogwarts_secret')
 EMERGENT_LLM_KEY = os.environ.get('EMERGENT_LLM_KEY')
 
+# JSON responses are rendered with orjson, which handles datetime, date and UUID natively.
+# Dates read back from Mongo are naive UTC, so they're tagged as such instead of being
+# emitted without an offset.
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_NAIVE_UTC
+
+def dumps_json(data) -> bytes:
+    # Anything orjson doesn't know (pydantic models, sets, ...) goes through FastAPI's encoder
+    return orjson.dumps(data, default=jsonable_encoder, option=ORJSON_OPTIONS)
+
+class FastJSONResponse(JSONResponse):
+    """App-wide default response class. Handlers returning large lists of raw Mongo documents
+    can return FastJSONResponse(docs) directly to also skip FastAPI's jsonable_encoder pass."""
+
+    def render(self, content) -> bytes:
+        return dumps_json(content)
+
 # Create the main app
-app = FastAPI()
+app = FastAPI(default_response_class=FastJSONResponse)
 api_router = APIRouter(prefix="/api")
 security = HTTPBearer(auto_error=False)
 
@@ -311,6 +355,21 @@ class SiteContentUpdate(BaseModel):
     booking_title: Optional[str] = None
     booking_subtitle: Optional[str] = None
 
+class DirectUploadRequest(BaseModel):
+    filename: str
+    content_type: str
+    size: int
+
+class DirectUploadComplete(BaseModel):
+    key: str
+    filename: Optional[str] = None
+
+class UploadSessionCreate(BaseModel):
+    filename: str
+    content_type: str
+    size: int
+    kind: str = "cv"  # "cv" or "image"
+
 class AdminApprovalRequest(BaseModel):
     email: EmailStr
     name: str
@@ -333,11 +392,140 @@ class JobApplicationCreate(BaseModel):
 # AUTH HELPERS
 # =========================
 
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+# bcrypt runs on its own small thread pool (it releases the GIL) so a burst of logins
+# can't stall the event loop or starve the default executor used for file I/O.
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', min(4, os.cpu_count() or 1)))
+PASSWORD_HASH_MAX_QUEUE = int(os.environ.get('PASSWORD_HASH_MAX_QUEUE', 64))
+BCRYPT_TARGET_MS = float(os.environ.get('BCRYPT_TARGET_MS', 250))
+# Never below gensalt()'s default, which every existing hash was made with
+BCRYPT_MIN_ROUNDS = 12
+BCRYPT_MAX_ROUNDS = 15
+# An explicit BCRYPT_ROUNDS disables calibration
+bcrypt_rounds = int(os.environ.get('BCRYPT_ROUNDS', 12))
+
+_password_pool = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+_password_stats_lock = threading.Lock()
+password_hash_stats = {
+    "queued": 0,
+    "running": 0,
+    "completed": 0,
+    "rejected": 0,
+    "rehashed": 0,
+    "total_wait_ms": 0.0,
+    "max_wait_ms": 0.0,
+    "total_run_ms": 0.0,
+}
 
-def verify_password(password: str, hashed: str) -> bool:
-    return bcrypt.checkpw(password.encode(), hashed.encode())
+async def run_password_job(func, *args):
+    if password_hash_stats["queued"] >= PASSWORD_HASH_MAX_QUEUE:
+        password_hash_stats["rejected"] += 1
+        raise HTTPException(status_code=503, detail="Server busy, please try again", headers={"Retry-After": "1"})
+    submitted = time.perf_counter()
+
+    def job():
+        started = time.perf_counter()
+        with _password_stats_lock:
+            password_hash_stats["queued"] -= 1
+            password_hash_stats["running"] += 1
+        try:
+            return func(*args)
+        finally:
+            finished = time.perf_counter()
+            wait_ms = (started - submitted) * 1000
+            with _password_stats_lock:
+                password_hash_stats["running"] -= 1
+                password_hash_stats["completed"] += 1
+                password_hash_stats["total_wait_ms"] += wait_ms
+                password_hash_stats["max_wait_ms"] = max(password_hash_stats["max_wait_ms"], wait_ms)
+                password_hash_stats["total_run_ms"] += (finished - started) * 1000
+
+    with _password_stats_lock:
+        password_hash_stats["queued"] += 1
+    future = _password_pool.submit(job)
+    try:
+        return await asyncio.wrap_future(future)
+    except asyncio.CancelledError:
+        # Drop it from the queue if no worker has picked it up yet
+        if future.cancel():
+            with _password_stats_lock:
+                password_hash_stats["queued"] -= 1
+        raise
+
+def password_hash_report() -> dict:
+    completed = password_hash_stats["completed"]
+    return {
+        "workers": PASSWORD_HASH_WORKERS,
+        "max_queue": PASSWORD_HASH_MAX_QUEUE,
+        "bcrypt_rounds": bcrypt_rounds,
+        "target_ms": BCRYPT_TARGET_MS,
+        **{key: round(value, 2) for key, value in password_hash_stats.items()},
+        "avg_wait_ms": round(password_hash_stats["total_wait_ms"] / completed, 2) if completed else 0.0,
+        "avg_run_ms": round(password_hash_stats["total_run_ms"] / completed, 2) if completed else 0.0,
+    }
+
+def _hash_password(password: str, rounds: int) -> str:
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds)).decode()
+
+def _time_bcrypt(rounds: int) -> float:
+    started = time.perf_counter()
+    bcrypt.hashpw(b"calibration", bcrypt.gensalt(rounds))
+    return (time.perf_counter() - started) * 1000
+
+async def measure_bcrypt_rounds() -> int:
+    """Highest cost whose hash stays within BCRYPT_TARGET_MS on this machine, never below the floor"""
+    loop = asyncio.get_running_loop()
+    # Best of two, the first run also warms the worker thread
+    base_ms = min([await loop.run_in_executor(_password_pool, _time_bcrypt, BCRYPT_MIN_ROUNDS) for _ in range(2)])
+    rounds = BCRYPT_MIN_ROUNDS
+    # Each extra round doubles the work
+    while rounds < BCRYPT_MAX_ROUNDS and base_ms * 2 ** (rounds + 1 - BCRYPT_MIN_ROUNDS) <= BCRYPT_TARGET_MS:
+        rounds += 1
+    logger.info(f"bcrypt cost {rounds} measured (~{base_ms * 2 ** (rounds - BCRYPT_MIN_ROUNDS):.0f} ms, target {BCRYPT_TARGET_MS:.0f} ms)")
+    return rounds
+
+async def calibrate_bcrypt_rounds():
+    """Use the deployment's bcrypt cost, measuring it once if no worker has yet. Every worker
+    then hashes at the same cost; delete maintenance `bcrypt_rounds` to measure again."""
+    global bcrypt_rounds
+    if os.environ.get('BCRYPT_ROUNDS'):
+        return
+    stored = await db.maintenance.find_one({"_id": "bcrypt_rounds"})
+    if not stored:
+        rounds = await measure_bcrypt_rounds()
+        try:
+            # The first worker to finish decides; the others pick up its value
+            stored = await db.maintenance.find_one_and_update(
+                {"_id": "bcrypt_rounds"},
+                {"$setOnInsert": {"rounds": rounds, "target_ms": BCRYPT_TARGET_MS, "at": datetime.now(timezone.utc).isoformat()}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            stored = await db.maintenance.find_one({"_id": "bcrypt_rounds"})
+    bcrypt_rounds = max(stored["rounds"], BCRYPT_MIN_ROUNDS)
+
+async def hash_password(password: str) -> str:
+    return await run_password_job(_hash_password, password, bcrypt_rounds)
+
+async def verify_password(password: str, hashed: str) -> bool:
+    return await run_password_job(bcrypt.checkpw, password.encode(), hashed.encode())
+
+def password_needs_rehash(hashed: str) -> bool:
+    # Only ever upward, so workers or deploys at different costs can't rewrite hashes back and forth
+    try:
+        return int(hashed.split("$")[2]) < bcrypt_rounds
+    except (IndexError, ValueError):
+        return False
+
+async def rehash_password_if_needed(collection, account: dict, password: str):
+    """Upgrade a stored hash to the current cost after a successful login."""
+    if not password_needs_rehash(account["password"]):
+        return
+    new_hash = await hash_password(password)
+    # Matching on the old hash keeps a concurrent password reset from being overwritten
+    result = await collection.update_one({"id": account["id"], "password": account["password"]}, {"$set": {"password": new_hash}})
+    if result.modified_count:
+        password_hash_stats["rehashed"] += 1
 
 def create_token(data: dict, expires_delta: timedelta = timedelta(days=7)) -> str:
     to_encode = data.copy()
@@ -345,13 +533,31 @@ def create_token(data: dict, expires_delta: timedelta = timedelta(days=7)) -> st
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, JWT_SECRET, algorithm="HS256")
 
+# Verified payloads keyed by token digest, so repeat callers skip HS256 verification.
+# Entries are only trusted until the token's exp; revocation is still checked on every call.
+TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', 4096))
+_token_cache = LRUCache(maxsize=TOKEN_CACHE_SIZE)
+token_cache_stats = {"hits": 0, "misses": 0}
+
 def decode_token(token: str) -> dict:
-    try:
-        return jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(status_code=401, detail="Token expired")
-    except jwt.InvalidTokenError:
-        raise HTTPException(status_code=401, detail="Invalid token")
+    digest = hashlib.sha256(token.encode()).digest()
+    payload = _token_cache.get(digest)
+    if payload is not None and payload["exp"] > time.time():
+        token_cache_stats["hits"] += 1
+    else:
+        token_cache_stats["misses"] += 1
+        try:
+            payload = jwt.decode(token, JWT_SECRET, algorithms=["HS256"], options={"require": ["exp"]})
+        except jwt.ExpiredSignatureError:
+            _token_cache.pop(digest, None)
+            raise HTTPException(status_code=401, detail="Token expired")
+        except jwt.InvalidTokenError:
+            raise HTTPException(status_code=401, detail="Invalid token")
+        _token_cache[digest] = payload
+    if payload.get("ver", 0) < current_token_version(token_principal(payload)):
+        raise HTTPException(status_code=401, detail="Token revoked")
+    # Callers get their own copy so the cached payload can't be mutated
+    return dict(payload)
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     if not credentials:
@@ -382,13 +588,237 @@ async def get_admin_with_full_access(credentials: HTTPAuthorizationCredentials =
         raise HTTPException(status_code=403, detail="Admin access required")
     if payload.get("email") == SUPER_ADMIN_EMAIL:
         return payload
-    admin = await db.admins.find_one({"id": payload.get("admin_id")}, {"_id": 0})
+    # Access changes bump the token version, so a current token's claim can be trusted
+    if payload.get("access_level") in ["full", "super"]:
+        return payload
+    admin = await get_admin_principal(payload.get("admin_id"))
     if not admin or admin.get("access_level", "basic") not in ["full", "super"]:
         raise HTTPException(status_code=403, detail="Full access required")
     return payload
 
+# Admin records (minus password) keyed by admin_id. The admin management endpoints
+# invalidate entries directly; the TTL bounds staleness across worker processes.
+ADMIN_CACHE_TTL = int(os.environ.get('ADMIN_CACHE_TTL', 60))
+_admin_cache = TTLCache(maxsize=1024, ttl=ADMIN_CACHE_TTL)
+admin_cache_stats = {"hits": 0, "misses": 0}
+
+async def get_admin_principal(admin_id: Optional[str]) -> Optional[dict]:
+    if not admin_id:
+        return None
+    admin = _admin_cache.get(admin_id)
+    if admin is not None:
+        admin_cache_stats["hits"] += 1
+        return admin
+    admin_cache_stats["misses"] += 1
+    admin = await db.admins.find_one({"id": admin_id}, {"_id": 0, "password": 0})
+    if admin:
+        _admin_cache[admin_id] = admin
+    return admin
+
+def invalidate_admin_principal(admin_id: str):
+    _admin_cache.pop(admin_id, None)
+
 def generate_otp() -> str:
-    return ''.join(random.choices(string.digits, k=6))
+    return ''.join(secrets.choice(string.digits) for _ in range(6))
+
+# OTPs are stored as an HMAC so a database read doesn't reveal live codes. expires_at is a
+# BSON date so the TTL index on otp_codes removes stale codes; one code per (email, type).
+def hash_otp(email: str, otp_type: str, otp: str) -> str:
+    return hmac.new(JWT_SECRET.encode(), f"{otp_type}:{email.lower()}:{otp}".encode(), hashlib.sha256).hexdigest()
+
+async def issue_otp(email: str, otp_type: str, minutes: int, **extra) -> str:
+    otp = generate_otp()
+    await db.otp_codes.replace_one(
+        {"email": email, "type": otp_type},
+        {
+            "email": email,
+            "type": otp_type,
+            "otp_hash": hash_otp(email, otp_type, otp),
+            "expires_at": datetime.now(timezone.utc) + timedelta(minutes=minutes),
+            **extra
+        },
+        upsert=True
+    )
+    return otp
+
+async def consume_otp(email: str, otp_type: str, otp: str) -> Optional[dict]:
+    """Check and spend a code in one step, so it can't be used twice."""
+    return await db.otp_codes.find_one_and_delete({
+        "email": email,
+        "type": otp_type,
+        "otp_hash": hash_otp(email, otp_type, otp),
+        "expires_at": {"$gt": datetime.now(timezone.utc)}
+    }, projection={"_id": 0})
+
+# =========================
+# TOKEN VERSIONS
+# =========================
+
+# Each principal ("admin:<id>" / "user:<id>") has a version that is embedded in its tokens as
+# "ver". Suspending, deleting, changing access or resetting a password bumps it, which revokes
+# every token issued before. Only principals that were ever bumped are stored in
+# db.token_versions, and this process keeps them in memory so the check is a dict lookup.
+TOKEN_VERSION_POLL_INTERVAL = int(os.environ.get('TOKEN_VERSION_POLL_INTERVAL', 5))
+
+_token_versions: dict = {}
+
+def token_principal(payload: dict) -> Optional[str]:
+    if payload.get("role") == "admin":
+        return f"admin:{payload.get('admin_id')}"
+    if payload.get("user_id"):
+        return f"user:{payload['user_id']}"
+    return None
+
+def current_token_version(principal: Optional[str]) -> int:
+    return _token_versions.get(principal, 0)
+
+def apply_token_version(principal: str, version: int):
+    # Versions only move forward, so out-of-order notifications are harmless
+    if version > _token_versions.get(principal, 0):
+        _token_versions[principal] = version
+
+async def bump_token_version(principal: str) -> int:
+    doc = await db.token_versions.find_one_and_update(
+        {"_id": principal},
+        {"$inc": {"version": 1}, "$set": {"updated_at": datetime.now(timezone.utc).isoformat()}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    apply_token_version(principal, doc["version"])
+    return doc["version"]
+
+async def load_token_versions() -> str:
+    """Load every stored version; returns the newest updated_at for incremental polling."""
+    latest = ""
+    async for doc in db.token_versions.find({}):
+        apply_token_version(doc["_id"], doc["version"])
+        latest = max(latest, doc.get("updated_at", ""))
+    return latest
+
+async def poll_token_versions(since: str):
+    while True:
+        await asyncio.sleep(TOKEN_VERSION_POLL_INTERVAL)
+        try:
+            async for doc in db.token_versions.find({"updated_at": {"$gte": since}}):
+                apply_token_version(doc["_id"], doc["version"])
+                since = max(since, doc["updated_at"])
+        except Exception as e:
+            logger.error(f"Token version poll error: {str(e)}")
+
+async def token_version_sync_loop(since: str):
+    """Follow bumps made by other workers through a change stream, or poll when the
+    deployment has no oplog (standalone mongod)."""
+    try:
+        # Entering opens the stream, so reloading afterwards covers bumps made between the
+        # startup load and the stream's start point
+        async with db.token_versions.watch(full_document="updateLookup") as stream:
+            since = await load_token_versions() or since
+            async for change in stream:
+                doc = change.get("fullDocument")
+                if doc:
+                    apply_token_version(doc["_id"], doc["version"])
+    except OperationFailure as e:
+        logger.info(f"Token version change stream unavailable ({e.code}), polling every {TOKEN_VERSION_POLL_INTERVAL}s")
+    except Exception as e:
+        logger.error(f"Token version change stream error: {str(e)}")
+    # Pick up anything missed while the stream was down
+    await poll_token_versions(await load_token_versions() or since)
+
+# =========================
+# RATE LIMITING
+# =========================
+
+# Sliding-window counters: the estimate is the current window's count plus the previous
+# window's count weighted by how much of it still overlaps. Limits are checked at the top of
+# each handler, before any bcrypt, database, email or LLM work.
+#   memory - per process (default; fine for a single worker)
+#   mongo  - counters in db.rate_limits, shared by every worker, expired by a TTL index
+RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+# Only honour X-Forwarded-For when the app sits behind a proxy that sets it. Each proxy
+# appends the address it saw, so the client is TRUSTED_PROXY_COUNT entries from the right;
+# anything further left was sent by the client and can be forged.
+TRUST_PROXY_HEADERS = os.environ.get('TRUST_PROXY_HEADERS', 'false').lower() == 'true'
+TRUSTED_PROXY_COUNT = max(1, int(os.environ.get('TRUSTED_PROXY_COUNT', 1)))
+
+# rule -> [(key scope, max requests, window seconds)]
+RATE_LIMITS = {
+    "login": [("ip", 20, 300), ("email", 10, 300)],
+    "otp_send": [("ip", 5, 600), ("email", 3, 600)],
+    "otp_verify": [("ip", 20, 600), ("email", 5, 600)],
+    "booking": [("ip", 10, 3600)],
+    "application": [("ip", 5, 3600)],
+    "cv_upload": [("ip", 10, 3600)],
+    "chat": [("ip", 30, 60)],
+}
+
+rate_limit_stats = {rule: {"allowed": 0, "rejected": 0} for rule in RATE_LIMITS}
+
+class MemoryRateLimitBackend:
+    def __init__(self):
+        longest = max(window for limits in RATE_LIMITS.values() for _, _, window in limits)
+        self.counts = TTLCache(maxsize=100_000, ttl=longest * 2)
+
+    async def hit(self, key: str, window_index: int, window: int) -> tuple:
+        current = (key, window_index)
+        self.counts[current] = self.counts.get(current, 0) + 1
+        return self.counts.get((key, window_index - 1), 0), self.counts[current]
+
+class MongoRateLimitBackend:
+    async def hit(self, key: str, window_index: int, window: int) -> tuple:
+        expires_at = datetime.fromtimestamp((window_index + 2) * window, timezone.utc)
+        doc = await db.rate_limits.find_one_and_update(
+            {"_id": f"{key}:{window_index}"},
+            {"$inc": {"count": 1}, "$setOnInsert": {"expires_at": expires_at}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        previous = await db.rate_limits.find_one({"_id": f"{key}:{window_index - 1}"}, {"count": 1})
+        return (previous or {}).get("count", 0), doc["count"]
+
+rate_limit_backend = MongoRateLimitBackend() if RATE_LIMIT_BACKEND == "mongo" else MemoryRateLimitBackend()
+
+def client_ip(request: Request) -> str:
+    if TRUST_PROXY_HEADERS:
+        forwarded = [ip.strip() for header in request.headers.getlist("x-forwarded-for") for ip in header.split(",")]
+        forwarded = [ip for ip in forwarded if ip]
+        if len(forwarded) >= TRUSTED_PROXY_COUNT:
+            return forwarded[-TRUSTED_PROXY_COUNT]
+    return request.client.host if request.client else "unknown"
+
+def rate_limit_retry_after(previous: int, current: int, limit: int, window: int, elapsed: float) -> int:
+    remaining = window - elapsed
+    if current >= limit:
+        # Wait out this window, then until its own weight decays below the limit
+        return math.ceil(remaining + window * (1 - limit / current)) or 1
+    # Wait until enough of the previous window has slid out
+    return max(1, math.ceil(remaining - (limit - current) * window / previous))
+
+async def enforce_rate_limit(rule: str, request: Request, email: Optional[str] = None):
+    if not RATE_LIMIT_ENABLED:
+        return
+    now = time.time()
+    for scope, limit, window in RATE_LIMITS[rule]:
+        value = client_ip(request) if scope == "ip" else (email or "").lower()
+        if not value:
+            continue
+        window_index = int(now // window)
+        elapsed = now - window_index * window
+        try:
+            previous, current = await rate_limit_backend.hit(f"{rule}:{scope}:{value}", window_index, window)
+        except Exception as e:
+            # Fail open: a limiter outage shouldn't take the site down with it
+            logger.error(f"Rate limit backend error: {str(e)}")
+            return
+        if previous * (window - elapsed) / window + current > limit:
+            rate_limit_stats[rule]["rejected"] += 1
+            logger.warning(f"Rate limit {rule} exceeded for {scope} {value}")
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests, please try again later",
+                headers={"Retry-After": str(rate_limit_retry_after(previous, current, limit, window, elapsed))},
+            )
+    rate_limit_stats[rule]["allowed"] += 1
 
 # =========================
 # EMAIL HELPERS
@@ -538,55 +968,1355 @@ async def send_admin_notification(booking: dict):
     """
     await send_email(ADMIN_EMAIL, f"New Booking - {booking['full_name']}", html)
 
+# =========================
+# UPLOAD STORAGE
+# =========================
+
+S3_PRESIGN_EXPIRY = int(os.environ.get('S3_PRESIGN_EXPIRY', 900))
+
+class LocalUploadStorage:
+    """Uploads kept in UPLOAD_DIR on this node"""
+    name = "local"
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def path(self, key: str) -> Path:
+        return self.root / key
+
+    async def exists(self, key: str) -> bool:
+        return await asyncio.to_thread(self.path(key).is_file)
+
+    async def head(self, key: str) -> Optional[dict]:
+        try:
+            stat_result = await asyncio.to_thread(self.path(key).stat)
+        except FileNotFoundError:
+            return None
+        return {
+            "size": stat_result.st_size,
+            "content_type": mimetypes.guess_type(key)[0],
+            "etag": upload_etag(stat_result),
+            "modified": datetime.fromtimestamp(stat_result.st_mtime, timezone.utc),
+        }
+
+    async def put_file(self, src: Path, key: str, content_type: Optional[str] = None):
+        """Move a local file into the store (atomic rename)"""
+        dest = self.path(key)
+        await asyncio.to_thread(dest.parent.mkdir, parents=True, exist_ok=True)
+        await asyncio.to_thread(os.replace, src, dest)
+
+    async def move(self, src_key: str, dest_key: str):
+        await self.put_file(self.path(src_key), dest_key)
+
+    @asynccontextmanager
+    async def local_copy(self, key: str):
+        yield self.path(key)
+
+    async def delete(self, key: str):
+        await asyncio.to_thread(self.path(key).unlink, True)
+
+    async def list_keys(self, prefix: str) -> list:
+        parent, _, name_prefix = prefix.rpartition("/")
+        directory = self.root / parent if parent else self.root
+        paths = await asyncio.to_thread(lambda: list(directory.glob(f"{name_prefix}*")))
+        return [str(p.relative_to(self.root)) for p in paths if p.is_file()]
+
+    async def serve(self, request: Request, key: str, media_type: Optional[str] = None, vary: Optional[str] = None) -> Response:
+        if UPLOAD_SERVE_MODE in ("x-accel", "x-sendfile"):
+            return offloaded_upload_response(key, self.path(key), media_type, vary)
+        return await send_upload_file(request, self.path(key), media_type=media_type, vary=vary)
+
+    async def presign_upload(self, key: str, content_type: str, max_size: int) -> dict:
+        raise HTTPException(status_code=400, detail="Direct uploads require object storage")
+
+class S3UploadStorage:
+    """Uploads kept in an S3-compatible bucket (AWS S3, MinIO, moto).
+    Reads are served by redirecting to the bucket; UPLOAD_DIR is only used for staging."""
+    name = "s3"
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: Optional[str] = None,
+                 region: Optional[str] = None, public_base_url: Optional[str] = None):
+        import boto3
+        from botocore.exceptions import ClientError
+        self.client = boto3.client("s3", endpoint_url=endpoint_url, region_name=region)
+        self.client_error = ClientError
+        self.bucket = bucket
+        self.prefix = prefix
+        self.public_base_url = public_base_url.rstrip("/") if public_base_url else None
+        self.known_keys = LRUCache(maxsize=4096)
+
+    def object_key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    async def head(self, key: str) -> Optional[dict]:
+        try:
+            obj = await asyncio.to_thread(self.client.head_object, Bucket=self.bucket, Key=self.object_key(key))
+        except self.client_error as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return {"size": obj["ContentLength"], "content_type": obj.get("ContentType"), "etag": obj.get("ETag"), "modified": obj.get("LastModified")}
+
+    async def exists(self, key: str) -> bool:
+        if key in self.known_keys:
+            return True
+        found = await self.head(key) is not None
+        if found:
+            self.known_keys[key] = True
+        return found
+
+    async def put_file(self, src: Path, key: str, content_type: Optional[str] = None):
+        """Upload a local file into the bucket and remove the local copy"""
+        extra = {"CacheControl": UPLOAD_CACHE_CONTROL, "ContentType": content_type or mimetypes.guess_type(key)[0] or "application/octet-stream"}
+        await asyncio.to_thread(self.client.upload_file, str(src), self.bucket, self.object_key(key), ExtraArgs=extra)
+        await asyncio.to_thread(src.unlink, True)
+        self.known_keys[key] = True
+
+    async def move(self, src_key: str, dest_key: str):
+        """Server-side copy, so the bytes never pass through this process"""
+        await asyncio.to_thread(
+            self.client.copy_object,
+            Bucket=self.bucket,
+            Key=self.object_key(dest_key),
+            CopySource={"Bucket": self.bucket, "Key": self.object_key(src_key)},
+            CacheControl=UPLOAD_CACHE_CONTROL,
+            MetadataDirective="REPLACE",
+            ContentType=mimetypes.guess_type(dest_key)[0] or "application/octet-stream",
+        )
+        await self.delete(src_key)
+        self.known_keys[dest_key] = True
+
+    @asynccontextmanager
+    async def local_copy(self, key: str):
+        """Download an object to a staging file for the image pool"""
+        path = UPLOAD_DIR / f".{uuid.uuid4().hex}{Path(key).suffix}"
+        await asyncio.to_thread(self.client.download_file, self.bucket, self.object_key(key), str(path))
+        try:
+            yield path
+        finally:
+            await asyncio.to_thread(path.unlink, True)
+
+    async def delete(self, key: str):
+        self.known_keys.pop(key, None)
+        await asyncio.to_thread(self.client.delete_object, Bucket=self.bucket, Key=self.object_key(key))
+
+    async def list_keys(self, prefix: str) -> list:
+        def collect():
+            keys = []
+            paginator = self.client.get_paginator("list_objects_v2")
+            for page in paginator.paginate(Bucket=self.bucket, Prefix=self.object_key(prefix)):
+                keys.extend(obj["Key"][len(self.prefix):] for obj in page.get("Contents", []))
+            return keys
+        return await asyncio.to_thread(collect)
+
+    async def serve(self, request: Request, key: str, media_type: Optional[str] = None, vary: Optional[str] = None) -> Response:
+        if self.public_base_url:
+            url = f"{self.public_base_url}/{self.object_key(key)}"
+            cache_control = UPLOAD_CACHE_CONTROL
+        else:
+            url = await asyncio.to_thread(
+                self.client.generate_presigned_url,
+                "get_object",
+                Params={"Bucket": self.bucket, "Key": self.object_key(key)},
+                ExpiresIn=S3_PRESIGN_EXPIRY,
+            )
+            cache_control = f"private, max-age={S3_PRESIGN_EXPIRY // 2}"
+        headers = {"Cache-Control": cache_control}
+        if vary:
+            headers["Vary"] = vary
+        return RedirectResponse(url, status_code=302, headers=headers)
+
+    async def presign_upload(self, key: str, content_type: str, max_size: int) -> dict:
+        post = await asyncio.to_thread(
+            self.client.generate_presigned_post,
+            Bucket=self.bucket,
+            Key=self.object_key(key),
+            Fields={"Content-Type": content_type},
+            Conditions=[{"Content-Type": content_type}, ["content-length-range", 1, max_size]],
+            ExpiresIn=S3_PRESIGN_EXPIRY,
+        )
+        return {"upload_url": post["url"], "fields": post["fields"], "key": key}
+
+def create_upload_storage():
+    backend = os.environ.get('UPLOAD_STORAGE', 'local')
+    if backend == "s3":
+        return S3UploadStorage(
+            bucket=os.environ['S3_BUCKET'],
+            prefix=os.environ.get('S3_PREFIX', ''),
+            endpoint_url=os.environ.get('S3_ENDPOINT_URL'),
+            region=os.environ.get('S3_REGION'),
+            public_base_url=os.environ.get('S3_PUBLIC_BASE_URL'),
+        )
+    return LocalUploadStorage(UPLOAD_DIR)
+
+upload_storage = create_upload_storage()
+
 # =========================
 # FILE UPLOAD
 # =========================
 
-@api_router.post("/upload/image")
-async def upload_image(file: UploadFile = File(...), admin: dict = Depends(get_admin_with_full_access)):
-    if not file.content_type or not file.content_type.startswith("image/"):
-        raise HTTPException(status_code=400, detail="File must be an image")
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+MAX_IMAGE_SIZE = 5 * 1024 * 1024
+MAX_CV_SIZE = 10 * 1024 * 1024
+CV_CONTENT_TYPES = ["application/pdf", "application/msword", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"]
+
+UPLOAD_EXTENSION = re.compile(r"^[a-z0-9]{1,10}$")
+
+def upload_extension(filename: Optional[str], default_ext: str) -> str:
+    """Extension for a stored upload, taken from the client's filename and limited to what
+    UPLOAD_FILENAME accepts so it can't add path segments to a content-addressed name"""
+    filename = filename or ""
+    ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else default_ext
+    if not UPLOAD_EXTENSION.match(ext):
+        raise HTTPException(status_code=400, detail="Invalid file extension")
+    return ext
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _write_chunk(f, digest, chunk: bytes):
+    digest.update(chunk)
+    f.write(chunk)
+
+async def stream_upload_to_disk(file: UploadFile, max_size: int, too_large_detail: str) -> tuple:
+    """Stream an upload to a staging file in UPLOAD_DIR chunk by chunk, aborting once max_size is crossed.
+    Writes happen off the event loop; store_upload_blob moves the staged file into the upload store.
+    Returns (staging path, size, sha256 hex digest)."""
+    if file.size is not None and file.size > max_size:
+        raise HTTPException(status_code=400, detail=too_large_detail)
+
+    tmp_path = UPLOAD_DIR / f".{uuid.uuid4().hex}.part"
+    digest = hashlib.sha256()
+    size = 0
+    f = await asyncio.to_thread(open, tmp_path, "wb")
+    try:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_size:
+                raise HTTPException(status_code=400, detail=too_large_detail)
+            await asyncio.to_thread(_write_chunk, f, digest, chunk)
+        await asyncio.to_thread(f.close)
+    except BaseException:
+        await asyncio.to_thread(f.close)
+        await asyncio.to_thread(tmp_path.unlink, True)
+        raise
+    finally:
+        await file.close()
+    return tmp_path, size, digest.hexdigest()
+
+# Starlette's multipart parser spools the whole body before a handler runs, so the size limits
+# above only bound what gets copied into the store. This guard stops oversized bodies on the
+# way in: on Content-Length before anything is read, and for chunked bodies as soon as the
+# running total crosses the limit. The slack covers multipart boundaries and part headers.
+MULTIPART_SLACK = 64 * 1024
+UPLOAD_BODY_LIMITS = {
+    "/api/upload/image": (MAX_IMAGE_SIZE + MULTIPART_SLACK, "File size must be less than 5MB"),
+    "/api/upload/cv": (MAX_CV_SIZE + MULTIPART_SLACK, "File size must be less than 10MB"),
+}
+
+class UploadBodyLimitMiddleware:
+    def __init__(self, app, limits: dict):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            return await self.app(scope, receive, send)
+        max_body, detail = limit
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > max_body:
+            response = FastJSONResponse({"detail": detail}, status_code=413, headers={"Connection": "close"})
+            return await response(scope, receive, send)
+
+        received = 0
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_body:
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+        await self.app(scope, limited_receive, send)
+
+# Uploads are stored once per unique content as {sha256}.{ext} (cv_{sha256}.{ext} for CVs),
+# so URLs never change and can be cached forever. db.uploads holds one document per blob
+# with a reference count kept in step with the documents that point at it.
+UPLOAD_URL_PREFIX = "/api/uploads/"
+
+async def register_upload_blob(filename: str, size: int, content_type: str, kind: str,
+                               digest: Optional[str] = None, mime_type: Optional[str] = None) -> dict:
+    now = datetime.now(timezone.utc).isoformat()
+    blob = {
+        "sha256": digest,
+        "filename": filename,
+        "size": size,
+        "content_type": content_type,
+        "mime_type": mime_type,
+        "kind": kind,
+        "refs": 0,
+        "created_at": now,
+    }
+    await db.uploads.update_one(
+        {"filename": filename},
+        {"$setOnInsert": blob, "$set": {"last_uploaded_at": now}},
+        upsert=True
+    )
+    return blob
+
+async def store_upload_blob(tmp_path: Path, digest: str, size: int, filename: str, content_type: str, kind: str) -> dict:
+    """Move a staged file into the content-addressed store, or drop it if the content is already stored"""
+    # An optimized blob keeps its name and the digest it was uploaded with as source_sha256.
+    # Blobs stored under an unvalidated client extension are never handed out again.
+    existing = await db.uploads.find_one(
+        {"$or": [{"sha256": digest}, {"source_sha256": digest}], "filename": {"$regex": UPLOAD_FILENAME.pattern}},
+        {"_id": 0}
+    )
+    if existing and await upload_storage.exists(existing["filename"]):
+        await asyncio.to_thread(tmp_path.unlink, True)
+        now = datetime.now(timezone.utc).isoformat()
+        await db.uploads.update_one(
+            {"filename": existing["filename"]},
+            {"$set": {"last_uploaded_at": now}, "$unset": {"orphaned_at": ""}}
+        )
+        return existing
     
-    content = await file.read()
-    if len(content) > 5 * 1024 * 1024:
-        raise HTTPException(status_code=400, detail="File size must be less than 5MB")
+    mime_type = await asyncio.to_thread(sniff_file_mime, tmp_path)
+    await upload_storage.put_file(tmp_path, filename, content_type)
+    return await register_upload_blob(filename, size, content_type, kind, digest, mime_type)
+
+# Fields a public form fills in freely; they must not pin (or later release) someone else's upload
+UNTRUSTED_URL_FIELDS = {"portfolio_url"}
+
+def is_cv_filename(value: Optional[str]) -> bool:
+    return bool(value) and value.startswith("cv_") and bool(UPLOAD_FILENAME.match(value))
+
+def upload_filenames(doc: Optional[dict]) -> set:
+    """Names of stored uploads referenced by a document's URL fields (and an application's cv_filename)"""
+    names = set()
+    if not doc:
+        return names
+    for key, value in doc.items():
+        if not isinstance(value, str) or not value:
+            continue
+        if key == "cv_filename":
+            # Sent by anonymous applicants, so it may only ever name a CV
+            if is_cv_filename(value):
+                names.add(value)
+        elif UPLOAD_URL_PREFIX in value and key not in UNTRUSTED_URL_FIELDS:
+            names.add(value.rsplit(UPLOAD_URL_PREFIX, 1)[1].split("?")[0])
+    return names
+
+def blob_query(filename: str) -> dict:
+    return {"$or": [{"filename": filename}, {"web_filename": filename}]}
+
+async def delete_blob_files(blob: dict):
+    for name in filter(None, [blob.get("filename"), blob.get("web_filename")]):
+        variants = await upload_storage.list_keys(f"variants/{Path(name).stem}_w")
+        for key in [name, *variants]:
+            await upload_storage.delete(key)
+
+async def release_upload(filename: str):
+    """Drop one reference; a blob left with none is marked for the garbage collector"""
+    await db.uploads.update_one({**blob_query(filename), "refs": {"$gt": 0}}, {"$inc": {"refs": -1}})
+    await db.uploads.update_one(
+        {**blob_query(filename), "refs": {"$lte": 0}, "orphaned_at": {"$exists": False}},
+        {"$set": {"orphaned_at": datetime.now(timezone.utc).isoformat()}}
+    )
+
+async def sync_upload_refs(before: Optional[dict], after: Optional[dict]):
+    """Adjust reference counts for uploads added or dropped between two versions of a document"""
+    old_names, new_names = upload_filenames(before), upload_filenames(after)
+    for name in new_names - old_names:
+        await db.uploads.update_one(blob_query(name), {"$inc": {"refs": 1}, "$unset": {"orphaned_at": ""}})
+    for name in old_names - new_names:
+        await release_upload(name)
+
+async def finish_image_upload(blob: dict) -> dict:
+    filename = blob["filename"]
+    ext = filename.rsplit(".", 1)[-1]
     
-    ext = file.filename.split(".")[-1] if "." in file.filename else "jpg"
-    filename = f"{uuid.uuid4()}.{ext}"
-    filepath = UPLOAD_DIR / filename
+    if "width" not in blob:
+        details = await describe_upload_image(filename)
+        if details:
+            blob.update(details)
+            await db.uploads.update_one({"filename": filename}, {"$set": details})
     
-    with open(filepath, "wb") as f:
-        f.write(content)
+    # Browsers can't show HEIC and big PNGs are wasteful: serve a web copy, keep the original
+    if not blob.get("web_filename") and needs_web_transcode(ext, blob["size"]):
+        web_filename = await transcode_upload_for_web(filename)
+        if web_filename:
+            blob["web_filename"] = web_filename
+            await db.uploads.update_one({"filename": filename}, {"$set": {"web_filename": web_filename}})
+    if blob.get("web_filename"):
+        return {
+            "url": f"/api/uploads/{blob['web_filename']}",
+            "filename": blob["web_filename"],
+            "original_url": f"/api/uploads/{filename}",
+            "meta": upload_meta(blob),
+        }
     
     # Return the API URL path that will work
-    return {"url": f"/api/uploads/{filename}", "filename": filename}
+    return {"url": f"/api/uploads/{filename}", "filename": filename, "meta": upload_meta(blob)}
 
-@api_router.get("/uploads/{filename}")
-async def get_upload(filename: str):
-    filepath = UPLOAD_DIR / filename
-    if not filepath.exists():
-        raise HTTPException(status_code=404, detail="File not found")
-    return FileResponse(filepath)
+@api_router.post("/upload/image")
+async def upload_image(file: UploadFile = File(...), admin: dict = Depends(get_admin_with_full_access)):
+    if not file.content_type or not file.content_type.startswith("image/"):
+        raise HTTPException(status_code=400, detail="File must be an image")
+    
+    ext = upload_extension(file.filename, "jpg")
+    tmp_path, size, digest = await stream_upload_to_disk(file, MAX_IMAGE_SIZE, "File size must be less than 5MB")
+    blob = await store_upload_blob(tmp_path, digest, size, f"{digest}.{ext}", file.content_type, "image")
+    return await finish_image_upload(blob)
 
 @api_router.post("/upload/cv")
-async def upload_cv(file: UploadFile = File(...)):
+async def upload_cv(request: Request, file: UploadFile = File(...)):
     """Upload CV/Resume file (PDF only, public endpoint for job applications)"""
-    allowed_types = ["application/pdf", "application/msword", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"]
-    if not file.content_type or file.content_type not in allowed_types:
+    await enforce_rate_limit("cv_upload", request)
+    if not file.content_type or file.content_type not in CV_CONTENT_TYPES:
         raise HTTPException(status_code=400, detail="File must be a PDF or Word document")
     
-    content = await file.read()
-    if len(content) > 10 * 1024 * 1024:  # 10MB limit for CVs
+    ext = upload_extension(file.filename, "pdf")
+    tmp_path, size, digest = await stream_upload_to_disk(file, MAX_CV_SIZE, "File size must be less than 10MB")
+    blob = await store_upload_blob(tmp_path, digest, size, f"cv_{digest}.{ext}", file.content_type, "cv")
+    filename = blob["filename"]
+    
+    return {"url": f"/api/uploads/{filename}", "filename": filename, "original_name": file.filename}
+
+# Direct uploads: the client POSTs straight to object storage with a presigned form, then calls
+# .../complete. Files land under incoming/ and are copied into place only after validation.
+# Objects never completed are removed by the upload GC once INCOMING_UPLOAD_TTL has passed;
+# a bucket lifecycle rule expiring incoming/ after a day does the same without the app.
+INCOMING_UPLOAD_TTL = timedelta(seconds=S3_PRESIGN_EXPIRY) + timedelta(hours=1)
+DIRECT_UPLOAD_KEY = re.compile(r"^incoming/(image|cv)/[0-9a-f]{32}\.[a-z0-9]{1,10}$")
+
+def direct_upload_key(kind: str, filename: str, default_ext: str) -> str:
+    ext = upload_extension(filename, default_ext)
+    return f"incoming/{kind}/{uuid.uuid4().hex}.{ext}"
+
+async def complete_direct_upload(key: str, kind: str, max_size: int, content_type_ok) -> dict:
+    match = DIRECT_UPLOAD_KEY.match(key)
+    if not match or match.group(1) != kind:
+        raise HTTPException(status_code=400, detail="Invalid upload key")
+    head = await upload_storage.head(key)
+    if not head:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    if head["size"] > max_size or not content_type_ok(head["content_type"]):
+        await upload_storage.delete(key)
+        raise HTTPException(status_code=400, detail="Uploaded file failed validation")
+    
+    name = key.rsplit("/", 1)[-1]
+    filename = f"cv_{name}" if kind == "cv" else name
+    await upload_storage.move(key, filename)
+    return await register_upload_blob(filename, head["size"], head["content_type"], kind)
+
+@api_router.post("/upload/image/presign")
+async def presign_image_upload(data: DirectUploadRequest, admin: dict = Depends(get_admin_with_full_access)):
+    if not data.content_type.startswith("image/"):
+        raise HTTPException(status_code=400, detail="File must be an image")
+    if data.size > MAX_IMAGE_SIZE:
+        raise HTTPException(status_code=400, detail="File size must be less than 5MB")
+    key = direct_upload_key("image", data.filename, "jpg")
+    return await upload_storage.presign_upload(key, data.content_type, MAX_IMAGE_SIZE)
+
+@api_router.post("/upload/image/complete")
+async def complete_image_upload(data: DirectUploadComplete, admin: dict = Depends(get_admin_with_full_access)):
+    blob = await complete_direct_upload(data.key, "image", MAX_IMAGE_SIZE, lambda ct: bool(ct) and ct.startswith("image/"))
+    return await finish_image_upload(blob)
+
+@api_router.post("/upload/cv/presign")
+async def presign_cv_upload(data: DirectUploadRequest, request: Request):
+    """Presigned direct-to-storage CV upload (public endpoint for job applications)"""
+    await enforce_rate_limit("cv_upload", request)
+    if data.content_type not in CV_CONTENT_TYPES:
+        raise HTTPException(status_code=400, detail="File must be a PDF or Word document")
+    if data.size > MAX_CV_SIZE:
         raise HTTPException(status_code=400, detail="File size must be less than 10MB")
+    key = direct_upload_key("cv", data.filename, "pdf")
+    return await upload_storage.presign_upload(key, data.content_type, MAX_CV_SIZE)
+
+@api_router.post("/upload/cv/complete")
+async def complete_cv_upload(data: DirectUploadComplete):
+    blob = await complete_direct_upload(data.key, "cv", MAX_CV_SIZE, lambda ct: ct in CV_CONTENT_TYPES)
+    filename = blob["filename"]
+    return {"url": f"/api/uploads/{filename}", "filename": filename, "original_name": data.filename or filename}
+
+# =========================
+# UPLOAD METADATA
+# =========================
+
+# Magic-byte signatures: (offset, bytes, MIME type)
+FILE_SIGNATURES = [
+    (0, b"\xff\xd8\xff", "image/jpeg"),
+    (0, b"\x89PNG\r\n\x1a\n", "image/png"),
+    (0, b"GIF87a", "image/gif"),
+    (0, b"GIF89a", "image/gif"),
+    (8, b"WEBP", "image/webp"),
+    (4, b"ftypheic", "image/heic"),
+    (4, b"ftypheix", "image/heic"),
+    (4, b"ftypmif1", "image/heif"),
+    (4, b"ftypmsf1", "image/heif"),
+    (4, b"ftypavif", "image/avif"),
+    (0, b"BM", "image/bmp"),
+    (0, b"II*\x00", "image/tiff"),
+    (0, b"MM\x00*", "image/tiff"),
+    (0, b"%PDF-", "application/pdf"),
+    (0, b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "application/msword"),
+    (0, b"PK\x03\x04", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"),
+]
+
+def sniff_mime(head: bytes) -> Optional[str]:
+    for offset, signature, mime_type in FILE_SIGNATURES:
+        if head[offset:offset + len(signature)] == signature:
+            return mime_type
+    return None
+
+def sniff_file_mime(path: Path) -> Optional[str]:
+    with open(path, "rb") as f:
+        return sniff_mime(f.read(32))
+
+UPLOAD_META_FIELDS = ("size", "mime_type", "width", "height", "placeholder", "sha256")
+
+def upload_meta(blob: dict) -> dict:
+    return {k: blob[k] for k in UPLOAD_META_FIELDS if blob.get(k) is not None}
+
+async def attach_upload_meta(docs: list) -> list:
+    """Add `<name>_meta` next to every `<name>_url` that points at a stored upload (image_url -> image_meta)"""
+    wanted = {}
+    for doc in docs:
+        for key, value in doc.items():
+            if key.endswith("_url") and isinstance(value, str) and UPLOAD_URL_PREFIX in value:
+                wanted[(id(doc), key)] = value.rsplit(UPLOAD_URL_PREFIX, 1)[1].split("?")[0]
+    if not wanted:
+        return docs
+    
+    names = list(set(wanted.values()))
+    blobs = {}
+    async for blob in db.uploads.find(
+        {"$or": [{"filename": {"$in": names}}, {"web_filename": {"$in": names}}]},
+        {"_id": 0, "filename": 1, "web_filename": 1, **{k: 1 for k in UPLOAD_META_FIELDS}}
+    ):
+        blobs[blob["filename"]] = blob
+        if blob.get("web_filename"):
+            blobs[blob["web_filename"]] = blob
+    for doc in docs:
+        for key in list(doc.keys()):
+            name = wanted.get((id(doc), key))
+            if name in blobs:
+                doc[f"{key[:-len('_url')]}_meta"] = upload_meta(blobs[name])
+    return docs
+
+# =========================
+# RESUMABLE UPLOADS
+# =========================
+
+# Create a session, PATCH the bytes in pieces with an Upload-Offset header (resuming from
+# GET .../{id} after a disconnect), then finalize. Partial bytes live in UPLOAD_SESSION_DIR
+# on the node that accepted the session, so with several app servers /api/upload/sessions/*
+# needs sticky routing (or a shared UPLOAD_DIR); a node without the partial file answers 409.
+# Abandoned sessions are collected in the background.
+UPLOAD_SESSION_DIR = UPLOAD_DIR / ".sessions"
+UPLOAD_SESSION_DIR.mkdir(exist_ok=True)
+UPLOAD_SESSION_TTL = timedelta(hours=24)
+UPLOAD_SESSION_GC_INTERVAL = 600
+
+UPLOAD_SESSION_KINDS = {
+    "cv": {"max_size": MAX_CV_SIZE, "too_large": "File size must be less than 10MB", "default_ext": "pdf"},
+    "image": {"max_size": MAX_IMAGE_SIZE, "too_large": "File size must be less than 5MB", "default_ext": "jpg"},
+}
+
+def session_path(session_id: str) -> Path:
+    return UPLOAD_SESSION_DIR / f"{session_id}.part"
+
+async def get_upload_session(session_id: str) -> dict:
+    session = await db.upload_sessions.find_one({"id": session_id}, {"_id": 0})
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return session
+
+SESSION_DATA_MISSING = "Upload session data is not on this server, retry against the server that created it"
+
+async def require_session_file(path: Path):
+    if not await asyncio.to_thread(path.exists):
+        raise HTTPException(status_code=409, detail=SESSION_DATA_MISSING)
+
+def _write_at(path: Path, offset: int, data: bytes):
+    with open(path, "r+b") as f:
+        f.seek(offset)
+        f.write(data)
+
+@api_router.post("/upload/sessions")
+async def create_upload_session(data: UploadSessionCreate, request: Request, credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Start a resumable upload (CVs are public, images need full admin access)"""
+    limits = UPLOAD_SESSION_KINDS.get(data.kind)
+    if not limits:
+        raise HTTPException(status_code=400, detail="Invalid upload kind")
+    if data.kind == "image":
+        await get_admin_with_full_access(credentials)
+        if not data.content_type.startswith("image/"):
+            raise HTTPException(status_code=400, detail="File must be an image")
+    else:
+        await enforce_rate_limit("cv_upload", request)
+        if data.content_type not in CV_CONTENT_TYPES:
+            raise HTTPException(status_code=400, detail="File must be a PDF or Word document")
+    if data.size <= 0 or data.size > limits["max_size"]:
+        raise HTTPException(status_code=400, detail=limits["too_large"])
+    upload_extension(data.filename, limits["default_ext"])
     
-    ext = file.filename.split(".")[-1] if "." in file.filename else "pdf"
-    filename = f"cv_{uuid.uuid4()}.{ext}"
-    filepath = UPLOAD_DIR / filename
+    now = datetime.now(timezone.utc)
+    session = {
+        "id": str(uuid.uuid4()),
+        "kind": data.kind,
+        "filename": data.filename,
+        "content_type": data.content_type,
+        "size": data.size,
+        "offset": 0,
+        "created_at": now.isoformat(),
+        "expires_at": (now + UPLOAD_SESSION_TTL).isoformat(),
+    }
+    await asyncio.to_thread(session_path(session["id"]).touch)
+    await db.upload_sessions.insert_one(session.copy())
+    return session
+
+@api_router.get("/upload/sessions/{session_id}")
+async def get_upload_session_status(session_id: str):
+    session = await get_upload_session(session_id)
+    return Response(
+        content=dumps_json(session),
+        media_type="application/json",
+        headers={"Upload-Offset": str(session["offset"]), "Cache-Control": "no-store"},
+    )
+
+@api_router.patch("/upload/sessions/{session_id}")
+async def append_upload_chunk(session_id: str, request: Request):
+    """Append bytes at the Upload-Offset header. On disconnect the bytes received so far are kept."""
+    session = await get_upload_session(session_id)
+    try:
+        offset = int(request.headers.get("upload-offset", ""))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Upload-Offset header required")
+    if offset != session["offset"]:
+        raise HTTPException(status_code=409, detail="Offset mismatch", headers={"Upload-Offset": str(session["offset"])})
     
-    with open(filepath, "wb") as f:
-        f.write(content)
+    path = session_path(session_id)
+    await require_session_file(path)
+    written = 0
+    buffer = bytearray()
+    disconnected = False
+    try:
+        async for chunk in request.stream():
+            if offset + written + len(buffer) + len(chunk) > session["size"]:
+                raise HTTPException(status_code=400, detail="Chunk exceeds declared upload size")
+            buffer.extend(chunk)
+            if len(buffer) >= UPLOAD_CHUNK_SIZE:
+                await asyncio.to_thread(_write_at, path, offset + written, bytes(buffer))
+                written += len(buffer)
+                buffer.clear()
+    except ClientDisconnect:
+        disconnected = True
+    except FileNotFoundError:
+        # Collected or lost between the check above and the write
+        raise HTTPException(status_code=409, detail=SESSION_DATA_MISSING)
+    if buffer:
+        try:
+            await asyncio.to_thread(_write_at, path, offset + written, bytes(buffer))
+        except FileNotFoundError:
+            raise HTTPException(status_code=409, detail=SESSION_DATA_MISSING)
+        written += len(buffer)
     
-    return {"url": f"/api/uploads/{filename}", "filename": filename, "original_name": file.filename}
+    new_offset = offset + written
+    result = await db.upload_sessions.update_one(
+        {"id": session_id, "offset": offset},
+        {"$set": {"offset": new_offset, "expires_at": (datetime.now(timezone.utc) + UPLOAD_SESSION_TTL).isoformat()}}
+    )
+    if result.matched_count == 0:
+        raise HTTPException(status_code=409, detail="Concurrent upload to this session")
+    if disconnected:
+        logger.info(f"Upload session {session_id} interrupted at {new_offset}/{session['size']} bytes")
+    return Response(status_code=204, headers={"Upload-Offset": str(new_offset)})
+
+@api_router.post("/upload/sessions/{session_id}/finalize")
+async def finalize_upload_session(session_id: str, credentials: HTTPAuthorizationCredentials = Depends(security)):
+    session = await get_upload_session(session_id)
+    if session["kind"] == "image":
+        await get_admin_with_full_access(credentials)
+    if session["offset"] != session["size"]:
+        raise HTTPException(status_code=409, detail="Upload incomplete", headers={"Upload-Offset": str(session["offset"])})
+    path = session_path(session_id)
+    await require_session_file(path)
+    # Claim the session so a repeated finalize can't store it twice
+    claimed = await db.upload_sessions.find_one_and_delete({"id": session_id})
+    if not claimed:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    
+    digest = await asyncio.to_thread(file_sha256, path)
+    name = session["filename"]
+    ext = upload_extension(name, UPLOAD_SESSION_KINDS[session["kind"]]["default_ext"])
+    if session["kind"] == "image":
+        blob = await store_upload_blob(path, digest, session["size"], f"{digest}.{ext}", session["content_type"], "image")
+        return await finish_image_upload(blob)
+    
+    blob = await store_upload_blob(path, digest, session["size"], f"cv_{digest}.{ext}", session["content_type"], "cv")
+    filename = blob["filename"]
+    return {"url": f"/api/uploads/{filename}", "filename": filename, "original_name": name}
+
+async def collect_abandoned_upload_sessions():
+    now = datetime.now(timezone.utc).isoformat()
+    expired = await db.upload_sessions.find({"expires_at": {"$lt": now}}, {"_id": 0, "id": 1}).to_list(1000)
+    for session in expired:
+        await db.upload_sessions.delete_one({"id": session["id"]})
+        await asyncio.to_thread(session_path(session["id"]).unlink, True)
+    
+    # Partial files whose session is gone (e.g. a crash between delete and unlink)
+    live = {s["id"] for s in await db.upload_sessions.find({}, {"_id": 0, "id": 1}).to_list(10000)}
+    cutoff = (datetime.now(timezone.utc) - UPLOAD_SESSION_TTL).timestamp()
+    stray = await asyncio.to_thread(lambda: [
+        p for p in UPLOAD_SESSION_DIR.glob("*.part")
+        if p.stem not in live and p.stat().st_mtime < cutoff
+    ])
+    for path in stray:
+        await asyncio.to_thread(path.unlink, True)
+    if expired or stray:
+        logger.info(f"Collected {len(expired)} abandoned upload sessions and {len(stray)} stray partial files")
+
+async def upload_session_gc_loop():
+    while True:
+        try:
+            await collect_abandoned_upload_sessions()
+        except Exception as e:
+            logger.error(f"Upload session GC error: {str(e)}")
+        await asyncio.sleep(UPLOAD_SESSION_GC_INTERVAL)
+
+# =========================
+# UPLOAD GARBAGE COLLECTION
+# =========================
+
+# Blobs nobody references are marked with orphaned_at (by release_upload or the reclaimer)
+# and deleted once they have stayed unreferenced for UPLOAD_GC_GRACE. The reclaimer works
+# from db.uploads; the upload directory is only listed once, to index pre-existing files.
+UPLOAD_GC_GRACE = timedelta(hours=int(os.environ.get('UPLOAD_GC_GRACE_HOURS', 72)))
+UPLOAD_GC_INTERVAL = int(os.environ.get('UPLOAD_GC_INTERVAL', 6 * 3600))
+UPLOAD_REFERENCE_SOURCES = ["services", "projects", "site_content", "site_settings", "applications"]
+# Applications never stored cv_filename before uploads were tracked, so CVs from that time
+# look unreferenced. They are kept unless deleting them is switched on explicitly.
+UPLOAD_GC_LEGACY_CVS = os.environ.get('UPLOAD_GC_LEGACY_CVS', 'false').lower() == 'true'
+LEGACY_UPLOAD_NAME = re.compile(r"^(cv_)?[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\.")
+
+async def referenced_upload_names() -> set:
+    names = set()
+    for collection in UPLOAD_REFERENCE_SOURCES:
+        async for doc in db[collection].find({}, {"_id": 0}):
+            names |= upload_filenames(doc)
+    return names
+
+async def web_copy_names() -> set:
+    return {blob["web_filename"] async for blob in db.uploads.find({"web_filename": {"$ne": None}}, {"_id": 0, "web_filename": 1})}
+
+async def flag_legacy_uploads():
+    """Fix up an index built before legacy blobs were flagged: flag uuid-named files and drop
+    entries that are really another blob's web copy. Runs once."""
+    if await db.maintenance.find_one({"_id": "uploads_legacy_flagged"}):
+        return
+    await db.uploads.update_many(
+        {"sha256": None, "filename": {"$regex": LEGACY_UPLOAD_NAME.pattern}},
+        {"$set": {"legacy": True}}
+    )
+    await db.uploads.delete_many({"kind": "legacy", "filename": {"$in": list(await web_copy_names())}})
+    await db.maintenance.update_one(
+        {"_id": "uploads_legacy_flagged"},
+        {"$set": {"at": datetime.now(timezone.utc).isoformat()}},
+        upsert=True
+    )
+
+async def index_existing_uploads() -> int:
+    """Register files stored before db.uploads existed. Runs once, then records that it has."""
+    if await db.maintenance.find_one({"_id": "uploads_indexed"}):
+        await flag_legacy_uploads()
+        return 0
+    now = datetime.now(timezone.utc).isoformat()
+    indexed = 0
+    web_copies = await web_copy_names()
+    for key in await upload_storage.list_keys(""):
+        if "/" in key or key.startswith(".") or key in web_copies:
+            continue
+        head = await upload_storage.head(key)
+        if not head:
+            continue
+        result = await db.uploads.update_one(
+            {"filename": key},
+            {"$setOnInsert": {
+                "sha256": None,
+                "filename": key,
+                "size": head["size"],
+                "content_type": head["content_type"],
+                "kind": "cv" if key.startswith("cv_") else "legacy",
+                "legacy": True,
+                "refs": 0,
+                "created_at": now,
+                "last_uploaded_at": now,
+            }},
+            upsert=True
+        )
+        indexed += 1 if result.upserted_id else 0
+    await db.maintenance.update_one({"_id": "uploads_indexed"}, {"$set": {"at": now, "count": indexed}}, upsert=True)
+    await db.maintenance.update_one({"_id": "uploads_legacy_flagged"}, {"$set": {"at": now}}, upsert=True)
+    return indexed
+
+async def collect_abandoned_direct_uploads() -> int:
+    """Delete incoming/ objects that were uploaded with a presigned form but never completed"""
+    cutoff = datetime.now(timezone.utc) - INCOMING_UPLOAD_TTL
+    deleted = 0
+    for key in await upload_storage.list_keys("incoming/"):
+        head = await upload_storage.head(key)
+        if head and head.get("modified") and head["modified"] < cutoff:
+            await upload_storage.delete(key)
+            deleted += 1
+    return deleted
+
+async def blob_storage_size(blob: dict) -> int:
+    total = 0
+    for name in filter(None, [blob.get("filename"), blob.get("web_filename")]):
+        variants = await upload_storage.list_keys(f"variants/{Path(name).stem}_w")
+        for key in [name, *variants]:
+            head = await upload_storage.head(key)
+            total += head["size"] if head else 0
+    return total
+
+async def collect_orphaned_uploads() -> dict:
+    """Mark unreferenced blobs, delete those past the grace period and report what was reclaimed"""
+    started = datetime.now(timezone.utc)
+    indexed = await index_existing_uploads()
+    referenced = await referenced_upload_names()
+    cutoff = (started - UPLOAD_GC_GRACE).isoformat()
+    report = {"indexed": indexed, "marked": 0, "restored": 0, "kept_legacy_cvs": 0, "deleted_files": [], "reclaimed_bytes": 0}
+    report["abandoned_direct_uploads"] = await collect_abandoned_direct_uploads()
+    
+    async for blob in db.uploads.find({}, {"_id": 0}):
+        names = {blob["filename"], blob.get("web_filename")} - {None}
+        orphaned_at = blob.get("orphaned_at")
+        if names & referenced:
+            if orphaned_at:
+                await db.uploads.update_one({"filename": blob["filename"]}, {"$unset": {"orphaned_at": ""}})
+                report["restored"] += 1
+            continue
+        if blob.get("legacy") and blob.get("kind") == "cv" and not UPLOAD_GC_LEGACY_CVS:
+            report["kept_legacy_cvs"] += 1
+            continue
+        if not orphaned_at:
+            await db.uploads.update_one(
+                {"filename": blob["filename"], "orphaned_at": {"$exists": False}},
+                {"$set": {"orphaned_at": started.isoformat()}}
+            )
+            report["marked"] += 1
+            continue
+        if orphaned_at > cutoff:
+            continue
+        size = await blob_storage_size(blob)
+        # Only delete if nothing re-attached or re-uploaded it since we read it
+        result = await db.uploads.delete_one({"filename": blob["filename"], "orphaned_at": orphaned_at, "refs": {"$lte": 0}})
+        if result.deleted_count:
+            await delete_blob_files(blob)
+            report["deleted_files"].append({"filename": blob["filename"], "bytes": size})
+            report["reclaimed_bytes"] += size
+    
+    report["ran_at"] = started.isoformat()
+    report["duration_ms"] = round((datetime.now(timezone.utc) - started).total_seconds() * 1000)
+    await db.maintenance.update_one({"_id": "uploads_gc_report"}, {"$set": report}, upsert=True)
+    logger.info(
+        f"Upload GC: marked {report['marked']}, deleted {len(report['deleted_files'])} "
+        f"blobs, reclaimed {report['reclaimed_bytes']} bytes"
+    )
+    return report
+
+async def acquire_maintenance_lease(name: str, seconds: int) -> bool:
+    """Take a named lease so only one worker runs a job at a time"""
+    now = datetime.now(timezone.utc)
+    try:
+        await db.maintenance.update_one(
+            {"_id": f"lease:{name}", "until": {"$lt": now.isoformat()}},
+            {"$set": {"until": (now + timedelta(seconds=seconds)).isoformat()}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        return False
+    return True
+
+async def release_maintenance_lease(name: str):
+    await db.maintenance.delete_one({"_id": f"lease:{name}"})
+
+async def upload_gc_loop():
+    while True:
+        await asyncio.sleep(UPLOAD_GC_INTERVAL)
+        try:
+            if await acquire_maintenance_lease("upload_gc", UPLOAD_GC_INTERVAL - 60):
+                await collect_orphaned_uploads()
+        except Exception as e:
+            logger.error(f"Upload GC error: {str(e)}")
+
+@api_router.get("/admin/uploads/gc")
+async def get_upload_gc_report(admin: dict = Depends(get_super_admin)):
+    """Last garbage collection report (Super admin only)"""
+    report = await db.maintenance.find_one({"_id": "uploads_gc_report"}, {"_id": 0})
+    return report or {"message": "Garbage collection has not run yet"}
+
+@api_router.post("/admin/uploads/gc")
+async def run_upload_gc(admin: dict = Depends(get_super_admin)):
+    """Run upload garbage collection now (Super admin only)"""
+    return await collect_orphaned_uploads()
+
+# =========================
+# UPLOAD OPTIMIZATION
+# =========================
+
+# Re-encodes stored JPEGs/PNGs that were saved raw: orientation applied, EXIF and other
+# metadata dropped (ICC profile kept), progressive JPEG with the source quantization tables
+# where possible, optimized PNG. Files are only replaced after the output has been decoded
+# and checked, and blobs are marked optimized_at so an interrupted run picks up where it stopped.
+OPTIMIZABLE_EXTENSIONS = {"jpg", "jpeg", "png"}
+OPTIMIZE_WORKERS = int(os.environ.get('OPTIMIZE_WORKERS', os.cpu_count() or 1))
+
+def optimize_image(src: str, dest: str) -> dict:
+    """Losslessly/near-losslessly re-encode src into dest and verify it (runs in a process pool)"""
+    with Image.open(src) as opened:
+        fmt = opened.format
+        icc_profile = opened.info.get("icc_profile")
+        needs_rotation = opened.getexif().get(0x0112, 1) != 1
+        oriented = ImageOps.exif_transpose(opened)
+        if fmt == "JPEG":
+            # quality="keep" reuses the source tables, which is only possible when the pixels are unchanged
+            if needs_rotation:
+                oriented.save(dest, format="JPEG", quality=90, optimize=True, progressive=True, icc_profile=icc_profile, comment="")
+            else:
+                opened.save(dest, format="JPEG", quality="keep", optimize=True, progressive=True, icc_profile=icc_profile, comment="")
+        elif fmt == "PNG":
+            oriented.save(dest, format="PNG", optimize=True, icc_profile=icc_profile)
+        else:
+            raise UnidentifiedImageError(f"Unsupported format {fmt}")
+        expected_size = oriented.size
+    with Image.open(dest) as check:
+        check.verify()
+    with Image.open(dest) as check:
+        if check.size != expected_size:
+            raise OSError(f"Optimized image is {check.size}, expected {expected_size}")
+    return {"width": expected_size[0], "height": expected_size[1]}
+
+async def optimize_upload_blob(blob: dict, pool: ProcessPoolExecutor) -> dict:
+    filename = blob["filename"]
+    staged = UPLOAD_DIR / f".{uuid.uuid4().hex}{Path(filename).suffix}"
+    loop = asyncio.get_running_loop()
+    now = datetime.now(timezone.utc).isoformat()
+    try:
+        async with upload_storage.local_copy(filename) as src:
+            before = (await asyncio.to_thread(src.stat)).st_size
+            source_digest = blob.get("sha256") or await asyncio.to_thread(file_sha256, src)
+            await loop.run_in_executor(pool, optimize_image, str(src), str(staged))
+        after = (await asyncio.to_thread(staged.stat)).st_size
+        if after < before:
+            # The name stays (URLs are cached forever); sha256 follows the stored bytes and
+            # source_sha256 keeps the uploaded digest so re-uploading the original still dedups
+            digest = await asyncio.to_thread(file_sha256, staged)
+            await upload_storage.put_file(staged, filename)
+            hashes = {"sha256": digest, "source_sha256": source_digest}
+        else:
+            await asyncio.to_thread(staged.unlink, True)
+            after = before
+            hashes = {"sha256": source_digest}
+    except (UnidentifiedImageError, OSError) as e:
+        await asyncio.to_thread(staged.unlink, True)
+        logger.warning(f"Could not optimize {filename}: {str(e)}")
+        await db.uploads.update_one({"filename": filename}, {"$set": {"optimized_at": now, "optimization": {"error": str(e)}}})
+        return {"filename": filename, "error": str(e)}
+    
+    result = {"filename": filename, "before": before, "after": after, "saved": before - after}
+    await db.uploads.update_one(
+        {"filename": filename},
+        {"$set": {"optimized_at": now, "optimization": result, "size": after, **hashes}}
+    )
+    return result
+
+async def optimize_uploads_backlog() -> dict:
+    """Optimize every stored JPEG/PNG not yet processed, using all cores. Safe to re-run."""
+    started = datetime.now(timezone.utc)
+    await index_existing_uploads()
+    blobs = [
+        blob async for blob in db.uploads.find(
+            {"optimized_at": {"$exists": False}, "kind": {"$ne": "cv"}},
+            {"_id": 0, "filename": 1, "sha256": 1}
+        )
+        if blob["filename"].rsplit(".", 1)[-1].lower() in OPTIMIZABLE_EXTENSIONS
+    ]
+    limiter = asyncio.Semaphore(OPTIMIZE_WORKERS)
+    
+    async def run(blob, pool):
+        async with limiter:
+            return await optimize_upload_blob(blob, pool)
+    
+    with ProcessPoolExecutor(max_workers=OPTIMIZE_WORKERS) as pool:
+        files = await asyncio.gather(*(run(blob, pool) for blob in blobs))
+    
+    report = {
+        "ran_at": started.isoformat(),
+        "duration_ms": round((datetime.now(timezone.utc) - started).total_seconds() * 1000),
+        "processed": len(files),
+        "failed": sum(1 for f in files if "error" in f),
+        "bytes_saved": sum(f.get("saved", 0) for f in files),
+        "files": files,
+    }
+    await db.maintenance.update_one({"_id": "uploads_optimize_report"}, {"$set": report}, upsert=True)
+    # Sizes changed, so cached ?meta=true responses are stale
+    invalidate_public_cache()
+    logger.info(f"Upload optimization: {report['processed']} files, {report['bytes_saved']} bytes saved")
+    return report
+
+async def run_optimize_job():
+    try:
+        await optimize_uploads_backlog()
+    except Exception as e:
+        logger.error(f"Upload optimization error: {str(e)}")
+    finally:
+        await release_maintenance_lease("upload_optimize")
+
+@api_router.get("/admin/uploads/optimize")
+async def get_upload_optimize_report(admin: dict = Depends(get_super_admin)):
+    """Last optimization report and remaining backlog (Super admin only)"""
+    report = await db.maintenance.find_one({"_id": "uploads_optimize_report"}, {"_id": 0}) or {}
+    report["pending"] = await db.uploads.count_documents({"optimized_at": {"$exists": False}, "kind": {"$ne": "cv"}})
+    return report
+
+@api_router.post("/admin/uploads/optimize", status_code=202)
+async def start_upload_optimize(admin: dict = Depends(get_super_admin)):
+    """Start re-optimizing stored images in the background (Super admin only)"""
+    if not await acquire_maintenance_lease("upload_optimize", 3600):
+        raise HTTPException(status_code=409, detail="Optimization is already running")
+    _background_tasks.append(asyncio.create_task(run_optimize_job()))
+    return {"message": "Optimization started"}
+
+# =========================
+# IMAGE DERIVATIVES
+# =========================
+
+IMAGE_VARIANT_WIDTHS = (320, 640, 1280)
+RESIZABLE_EXTENSIONS = {"jpg", "jpeg", "png", "webp", "gif", "bmp", "tiff", "heic", "heif"}
+IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', min(4, os.cpu_count() or 1)))
+
+_image_pool: Optional[ProcessPoolExecutor] = None
+_variant_jobs: dict = {}
+
+def get_image_pool() -> ProcessPoolExecutor:
+    global _image_pool
+    if _image_pool is None:
+        _image_pool = ProcessPoolExecutor(max_workers=IMAGE_WORKERS)
+    return _image_pool
+
+def render_image_variant(src: str, dest: str, width: int, fmt: str):
+    """Resize src to at most `width` pixels wide and save it as `fmt` (runs in the image pool)"""
+    with Image.open(src) as opened:
+        img = ImageOps.exif_transpose(opened)
+        if img.width > width:
+            height = max(1, round(img.height * width / img.width))
+            img = img.resize((width, height), Image.LANCZOS)
+        if fmt == "jpeg":
+            if img.mode != "RGB":
+                img = img.convert("RGB")
+            save_kwargs = {"quality": 82, "optimize": True, "progressive": True}
+        else:
+            if img.mode not in ("RGB", "RGBA"):
+                img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+            save_kwargs = {"quality": 80, "method": 4}
+        img.save(dest, format=fmt.upper(), **save_kwargs)
+
+HEIF_EXTENSIONS = {"heic", "heif"}
+LARGE_PNG_SIZE = int(os.environ.get('LARGE_PNG_SIZE', 1024 * 1024))
+
+def needs_web_transcode(ext: str, size: int) -> bool:
+    ext = ext.lower()
+    return ext in HEIF_EXTENSIONS or (ext == "png" and size > LARGE_PNG_SIZE)
+
+def transcode_image_for_web(src: str, dest: str):
+    """Re-encode src as a full-size WebP, keeping alpha (runs in the image pool)"""
+    with Image.open(src) as opened:
+        img = ImageOps.exif_transpose(opened)
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+        img.save(dest, format="WEBP", quality=85, method=4)
+
+async def run_image_job(func, filename: str, dest_key: str, *args) -> bool:
+    """Run func(src, staged_dest, *args) in the image pool and store the result under dest_key.
+    Returns False when the source can't be decoded."""
+    staged = UPLOAD_DIR / f".{uuid.uuid4().hex}{Path(dest_key).suffix}"
+    loop = asyncio.get_running_loop()
+    try:
+        async with upload_storage.local_copy(filename) as src:
+            await loop.run_in_executor(get_image_pool(), func, str(src), str(staged), *args)
+        await upload_storage.put_file(staged, dest_key)
+    except (UnidentifiedImageError, OSError) as e:
+        await asyncio.to_thread(staged.unlink, True)
+        hint = "" if HEIF_SUPPORTED else " (pillow_heif is not installed)"
+        logger.warning(f"Could not process {filename}{hint}: {str(e)}")
+        return False
+    return True
+
+async def transcode_upload_for_web(filename: str) -> Optional[str]:
+    """Store a WebP copy of an upload next to it. Returns its name, or None if the image can't be decoded."""
+    web_filename = f"{Path(filename).stem}.webp"
+    if await run_image_job(transcode_image_for_web, filename, web_filename):
+        return web_filename
+    return None
+
+PLACEHOLDER_WIDTH = 16
+
+def describe_image(src: str) -> dict:
+    """Display dimensions, sniffed MIME type and a tiny WebP data URI placeholder (runs in the image pool)"""
+    with Image.open(src) as opened:
+        mime_type = Image.MIME.get(opened.format)
+        img = ImageOps.exif_transpose(opened)
+        width, height = img.size
+        thumb = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+        thumb.thumbnail((PLACEHOLDER_WIDTH, PLACEHOLDER_WIDTH))
+        buf = io.BytesIO()
+        thumb.save(buf, format="WEBP", quality=40)
+    placeholder = "data:image/webp;base64," + base64.b64encode(buf.getvalue()).decode()
+    return {"width": width, "height": height, "mime_type": mime_type, "placeholder": placeholder}
+
+async def describe_upload_image(filename: str) -> Optional[dict]:
+    loop = asyncio.get_running_loop()
+    try:
+        async with upload_storage.local_copy(filename) as src:
+            details = await loop.run_in_executor(get_image_pool(), describe_image, str(src))
+    except (UnidentifiedImageError, OSError) as e:
+        logger.warning(f"Could not read image metadata for {filename}: {str(e)}")
+        return None
+    if not details["mime_type"]:
+        details.pop("mime_type")
+    return details
+
+def negotiate_variant_format(accept: str) -> str:
+    return "webp" if "image/webp" in (accept or "") else "jpeg"
+
+async def get_image_variant(filename: str, width: int, fmt: str) -> Optional[str]:
+    """Return the storage key of a cached derivative, rendering it in the image pool on first use.
+    Returns None when the source can't be decoded so the caller can fall back to the original."""
+    ext = "jpg" if fmt == "jpeg" else fmt
+    key = f"variants/{Path(filename).stem}_w{width}.{ext}"
+    if await upload_storage.exists(key):
+        return key
+
+    job = _variant_jobs.get(key)
+    if job is None:
+        job = asyncio.ensure_future(run_image_job(render_image_variant, filename, key, width, fmt))
+        _variant_jobs[key] = job
+        job.add_done_callback(lambda _: _variant_jobs.pop(key, None))
+    return key if await asyncio.shield(job) else None
+
+# =========================
+# UPLOAD HTTP CACHING
+# =========================
+
+# Stored uploads are content-addressed (or immutable UUIDs for older files), so they never change in place
+UPLOAD_CACHE_CONTROL = "public, max-age=31536000, immutable"
+MAX_BYTE_RANGES = 16
+
+def upload_etag(stat_result: os.stat_result) -> str:
+    return f'"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+
+def etag_matches(header: str, etag: str) -> bool:
+    """Weak comparison as used by If-None-Match"""
+    tags = [t.strip() for t in header.split(",")]
+    return "*" in tags or any(t.removeprefix("W/") == etag for t in tags)
+
+def not_modified(request: Request, etag: str, mtime: float) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return int(mtime) <= since.timestamp()
+    return False
+
+def parse_byte_ranges(header: str, size: int) -> Optional[list]:
+    """Parse a Range header into sorted, merged (start, end) pairs (inclusive).
+    Returns None for headers we ignore, [] when no range is satisfiable."""
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec:
+        return None
+    ranges = []
+    for part in spec.split(","):
+        start_s, sep, end_s = part.strip().partition("-")
+        if not sep:
+            return None
+        try:
+            if start_s:
+                start = int(start_s)
+                end = int(end_s) if end_s else size - 1
+            else:
+                suffix = int(end_s)
+                if suffix == 0:
+                    continue
+                start, end = max(0, size - suffix), size - 1
+        except ValueError:
+            return None
+        if start > end and end_s and start_s:
+            return None
+        if start >= size:
+            continue
+        ranges.append((start, min(end, size - 1)))
+    if len(ranges) > MAX_BYTE_RANGES:
+        return None
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+async def read_file_range(path: Path, start: int, end: int):
+    async with await anyio.open_file(path, "rb") as f:
+        await f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await f.read(min(UPLOAD_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+async def send_upload_file(request: Request, path: Path, media_type: Optional[str] = None, vary: Optional[str] = None) -> Response:
+    """Serve an upload with strong validators, immutable caching, 304s and single/multi-range support"""
+    try:
+        stat_result = await asyncio.to_thread(path.stat)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found")
+    media_type = media_type or mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    etag = upload_etag(stat_result)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "Cache-Control": UPLOAD_CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+    }
+    if vary:
+        headers["Vary"] = vary
+    
+    if not_modified(request, etag, stat_result.st_mtime):
+        headers.pop("Accept-Ranges")
+        return Response(status_code=304, headers=headers)
+    
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range.strip() in (etag, headers["Last-Modified"])):
+        size = stat_result.st_size
+        ranges = parse_byte_ranges(range_header, size)
+        if ranges == []:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        if ranges and len(ranges) == 1:
+            start, end = ranges[0]
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+            headers["Content-Length"] = str(end - start + 1)
+            return StreamingResponse(read_file_range(path, start, end), status_code=206, media_type=media_type, headers=headers)
+        if ranges:
+            boundary = uuid.uuid4().hex
+            parts = [
+                (f"--{boundary}\r\nContent-Type: {media_type}\r\nContent-Range: bytes {start}-{end}/{size}\r\n\r\n".encode(), start, end)
+                for start, end in ranges
+            ]
+            closing = f"\r\n--{boundary}--\r\n".encode()
+            length = sum(len(head) + end - start + 1 for head, start, end in parts) + 2 * (len(parts) - 1) + len(closing)
+            
+            async def multipart_body():
+                for i, (head, start, end) in enumerate(parts):
+                    yield (b"\r\n" if i else b"") + head
+                    async for chunk in read_file_range(path, start, end):
+                        yield chunk
+                yield closing
+            
+            headers["Content-Length"] = str(length)
+            return StreamingResponse(multipart_body(), status_code=206, media_type=f"multipart/byteranges; boundary={boundary}", headers=headers)
+    
+    return FileResponse(path, media_type=media_type, headers=headers, stat_result=stat_result)
+
+# =========================
+# UPLOAD SERVING
+# =========================
+
+# UPLOAD_SERVE_MODE (local storage only):
+#   app        - get_upload streams the file (default)
+#   static     - a StaticFiles mount in front of the API serves files directly; servers with
+#                the ASGI pathsend extension hand them to sendfile. ?w= variants still use get_upload.
+#   x-accel    - respond with X-Accel-Redirect: {UPLOAD_ACCEL_PREFIX}/{name} for nginx to stream
+#   x-sendfile - respond with X-Sendfile: {absolute path} (Apache mod_xsendfile, lighttpd, Caddy)
+UPLOAD_SERVE_MODE = os.environ.get('UPLOAD_SERVE_MODE', 'app')
+UPLOAD_ACCEL_PREFIX = os.environ.get('UPLOAD_ACCEL_PREFIX', '/_protected_uploads').rstrip("/")
+UPLOAD_FILENAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{0,127}(\.[A-Za-z0-9]{1,10})?$")
+
+def offloaded_upload_response(key: str, path: Path, media_type: Optional[str], vary: Optional[str]) -> Response:
+    headers = {"Cache-Control": UPLOAD_CACHE_CONTROL}
+    if UPLOAD_SERVE_MODE == "x-accel":
+        headers["X-Accel-Redirect"] = f"{UPLOAD_ACCEL_PREFIX}/{key}"
+    else:
+        headers["X-Sendfile"] = str(path.resolve())
+    if vary:
+        headers["Vary"] = vary
+    return Response(media_type=media_type or mimetypes.guess_type(key)[0] or "application/octet-stream", headers=headers)
+
+class UploadStaticFiles(StaticFiles):
+    """Static mount for UPLOAD_SERVE_MODE=static. Only plain upload names are served; anything
+    else (dotfiles, variants/, sessions) is a 404. StaticFiles has no Range support, so range
+    requests are handed to get_upload along with ?w= variant requests."""
+
+    def __init__(self, *args, upload_route=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.upload_route = upload_route
+
+    def wants_upload_route(self, scope) -> bool:
+        if any(key == b"range" for key, _ in scope["headers"]):
+            return True
+        return "w" in parse_qs(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True)
+
+    async def __call__(self, scope, receive, send):
+        name = scope["path"].rsplit("/uploads/", 1)[-1]
+        if not UPLOAD_FILENAME.match(name):
+            await Response(content='{"detail":"File not found"}', status_code=404, media_type="application/json")(scope, receive, send)
+            return
+        if self.upload_route and self.wants_upload_route(scope):
+            await self.upload_route.handle({**scope, "path_params": {"filename": name}}, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+    def file_response(self, *args, **kwargs) -> Response:
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = UPLOAD_CACHE_CONTROL
+        return response
+
+@api_router.get("/uploads/{filename}")
+async def get_upload(filename: str, request: Request, w: Optional[int] = None):
+    if not UPLOAD_FILENAME.match(filename):
+        raise HTTPException(status_code=404, detail="File not found")
+    if w is not None and w not in IMAGE_VARIANT_WIDTHS:
+        raise HTTPException(status_code=400, detail=f"Width must be one of {', '.join(map(str, IMAGE_VARIANT_WIDTHS))}")
+    
+    if w is not None and Path(filename).suffix.lower().lstrip(".") in RESIZABLE_EXTENSIONS:
+        if not await upload_storage.exists(filename):
+            raise HTTPException(status_code=404, detail="File not found")
+        fmt = negotiate_variant_format(request.headers.get("accept"))
+        variant_key = await get_image_variant(filename, w, fmt)
+        if variant_key:
+            return await upload_storage.serve(request, variant_key, media_type=f"image/{fmt}", vary="Accept")
+    # No existence check here: the storage backend (or the front proxy) answers 404 itself
+    return await upload_storage.serve(request, filename)
 
 # =========================
 # USER AUTH
@@ -602,27 +2332,32 @@ async def register_user(user: UserCreate):
         "id": str(uuid.uuid4()),
         "name": user.name,
         "email": user.email,
-        "password": hash_password(user.password),
+        "password": await hash_password(user.password),
         "created_at": datetime.now(timezone.utc).isoformat()
     }
-    await db.users.insert_one(user_doc)
-    token = create_token({"user_id": user_doc["id"], "email": user.email, "role": "user"})
+    try:
+        await db.users.insert_one(user_doc)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email already registered")
+    token = create_token({"user_id": user_doc["id"], "email": user.email, "role": "user", "ver": current_token_version(f"user:{user_doc['id']}")})
     return {"token": token, "user": {"id": user_doc["id"], "name": user.name, "email": user.email}}
 
 @api_router.post("/auth/login")
-async def login_user(data: UserLogin):
+async def login_user(data: UserLogin, request: Request):
+    await enforce_rate_limit("login", request, data.email)
     user = await db.users.find_one({"email": data.email}, {"_id": 0})
-    if not user or not verify_password(data.password, user["password"]):
+    if not user or not await verify_password(data.password, user["password"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    token = create_token({"user_id": user["id"], "email": user["email"], "role": "user"})
+    await rehash_password_if_needed(db.users, user, data.password)
+    token = create_token({"user_id": user["id"], "email": user["email"], "role": "user", "ver": current_token_version(f"user:{user['id']}")})
     return {"token": token, "user": {"id": user["id"], "name": user["name"], "email": user["email"]}}
 
 @api_router.get("/auth/me")
 async def get_me(current_user: dict = Depends(get_current_user)):
     if current_user.get("role") == "admin":
-        admin = await db.admins.find_one({"id": current_user.get("admin_id")}, {"_id": 0, "password": 0})
+        admin = await get_admin_principal(current_user.get("admin_id"))
         if admin:
-            admin["is_super_admin"] = admin.get("email") == SUPER_ADMIN_EMAIL
+            admin = {**admin, "is_super_admin": admin.get("email") == SUPER_ADMIN_EMAIL}
             return {"user": admin, "role": "admin"}
     
     user = await db.users.find_one({"id": current_user.get("user_id")}, {"_id": 0, "password": 0})
@@ -635,10 +2370,11 @@ async def get_me(current_user: dict = Depends(get_current_user)):
 # =========================
 
 @api_router.post("/admin/request-otp")
-async def request_admin_otp(data: AdminOTPRequest):
+async def request_admin_otp(data: AdminOTPRequest, request: Request):
     """Request OTP for admin registration. 
     For super admin email: OTP goes directly to them.
     For other emails: OTP goes to super admin for approval."""
+    await enforce_rate_limit("otp_send", request, data.email)
     
     existing_admin = await db.admins.find_one({}, {"_id": 0})
     if not existing_admin and data.email != SUPER_ADMIN_EMAIL:
@@ -649,16 +2385,7 @@ async def request_admin_otp(data: AdminOTPRequest):
     if existing:
         raise HTTPException(status_code=400, detail="This email is already registered as an admin")
     
-    otp = generate_otp()
-    expires = datetime.now(timezone.utc) + timedelta(minutes=30)  # Longer expiry for approval
-    
-    await db.otp_codes.delete_many({"email": data.email, "type": "admin_registration"})
-    await db.otp_codes.insert_one({
-        "email": data.email, 
-        "otp": otp, 
-        "expires": expires.isoformat(),
-        "type": "admin_registration"
-    })
+    otp = await issue_otp(data.email, "admin_registration", 30)  # Longer expiry for approval
     
     if data.email == SUPER_ADMIN_EMAIL:
         # Super admin gets OTP directly
@@ -702,15 +2429,10 @@ async def request_admin_otp(data: AdminOTPRequest):
         return {"message": "Registration request sent to super admin for approval. They will share the OTP with you."}
 
 @api_router.post("/admin/verify-otp")
-async def verify_admin_otp(data: AdminOTPVerify):
-    otp_doc = await db.otp_codes.find_one({"email": data.email, "otp": data.otp, "type": "admin_registration"}, {"_id": 0})
-    if not otp_doc:
-        # Also check legacy format without type
-        otp_doc = await db.otp_codes.find_one({"email": data.email, "otp": data.otp}, {"_id": 0})
-    if not otp_doc:
-        raise HTTPException(status_code=400, detail="Invalid OTP")
-    if datetime.fromisoformat(otp_doc["expires"]) < datetime.now(timezone.utc):
-        raise HTTPException(status_code=400, detail="OTP expired")
+async def verify_admin_otp(data: AdminOTPVerify, request: Request):
+    await enforce_rate_limit("otp_verify", request, data.email)
+    if not await consume_otp(data.email, "admin_registration", data.otp):
+        raise HTTPException(status_code=400, detail="Invalid or expired OTP")
     
     existing = await db.admins.find_one({"email": data.email}, {"_id": 0})
     if existing:
@@ -721,33 +2443,51 @@ async def verify_admin_otp(data: AdminOTPVerify):
         "id": str(uuid.uuid4()),
         "name": data.name,
         "email": data.email,
-        "password": hash_password(data.password),
+        "password": await hash_password(data.password),
         "access_level": "super" if is_super else "basic",  # Default to basic for non-super admins
         "suspended": False,
         "created_at": datetime.now(timezone.utc).isoformat()
     }
-    await db.admins.insert_one(admin_doc)
-    await db.otp_codes.delete_many({"email": data.email})
+    try:
+        await db.admins.insert_one(admin_doc)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Admin already exists")
     
-    token = create_token({"admin_id": admin_doc["id"], "email": data.email, "role": "admin"})
+    token = create_token({
+        "admin_id": admin_doc["id"],
+        "email": data.email,
+        "role": "admin",
+        "access_level": admin_doc["access_level"],
+        "ver": current_token_version(f"admin:{admin_doc['id']}"),
+    })
     return {"token": token, "admin": {"id": admin_doc["id"], "name": data.name, "email": data.email, "access_level": admin_doc["access_level"]}}
 
 @api_router.post("/admin/login")
-async def admin_login(data: AdminLogin):
+async def admin_login(data: AdminLogin, request: Request):
+    await enforce_rate_limit("login", request, data.email)
     admin = await db.admins.find_one({"email": data.email}, {"_id": 0})
-    if not admin or not verify_password(data.password, admin["password"]):
+    if not admin or not await verify_password(data.password, admin["password"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     # Check if admin is suspended
     if admin.get("suspended") and admin["email"] != SUPER_ADMIN_EMAIL:
         raise HTTPException(status_code=403, detail="Your account has been suspended. Contact the super admin.")
     
+    await rehash_password_if_needed(db.admins, admin, data.password)
+    
     # Ensure super admin always has super access
     if admin["email"] == SUPER_ADMIN_EMAIL and admin.get("access_level") != "super":
         await db.admins.update_one({"email": SUPER_ADMIN_EMAIL}, {"$set": {"access_level": "super"}})
+        invalidate_admin_principal(admin["id"])
         admin["access_level"] = "super"
     
-    token = create_token({"admin_id": admin["id"], "email": admin["email"], "role": "admin"})
+    token = create_token({
+        "admin_id": admin["id"],
+        "email": admin["email"],
+        "role": "admin",
+        "access_level": admin.get("access_level", "basic"),
+        "ver": current_token_version(f"admin:{admin['id']}"),
+    })
     return {
         "token": token,
         "admin": {
@@ -764,8 +2504,9 @@ async def admin_login(data: AdminLogin):
 # =========================
 
 @api_router.post("/auth/forgot-password")
-async def forgot_password(data: ForgotPasswordRequest):
+async def forgot_password(data: ForgotPasswordRequest, request: Request):
     """Request OTP for password reset - works for both admin and user"""
+    await enforce_rate_limit("otp_send", request, data.email)
     if data.user_type == "admin":
         user = await db.admins.find_one({"email": data.email}, {"_id": 0})
         if not user:
@@ -775,17 +2516,7 @@ async def forgot_password(data: ForgotPasswordRequest):
         if not user:
             raise HTTPException(status_code=404, detail="User not found with this email")
     
-    otp = generate_otp()
-    expires = datetime.now(timezone.utc) + timedelta(minutes=10)
-    
-    await db.otp_codes.delete_many({"email": data.email, "type": "password_reset"})
-    await db.otp_codes.insert_one({
-        "email": data.email, 
-        "otp": otp, 
-        "expires": expires.isoformat(),
-        "type": "password_reset",
-        "user_type": data.user_type
-    })
+    otp = await issue_otp(data.email, "password_reset", 10, user_type=data.user_type)
     
     html = f"""
     <div style="font-family: 'Segoe UI', sans-serif; max-width: 600px; margin: 0 auto; background: linear-gradient(135deg, #0a1a1f 0%, #0d2229 100%); color: white; border-radius: 16px; overflow: hidden;">
@@ -808,63 +2539,39 @@ async def forgot_password(data: ForgotPasswordRequest):
     return {"message": "OTP sent to your email", "email": data.email}
 
 @api_router.post("/auth/reset-password")
-async def reset_password(data: ResetPasswordVerify):
+async def reset_password(data: ResetPasswordVerify, request: Request):
     """Verify OTP and reset password"""
-    otp_doc = await db.otp_codes.find_one({
-        "email": data.email, 
-        "otp": data.otp, 
-        "type": "password_reset"
-    }, {"_id": 0})
-    
-    if not otp_doc:
-        raise HTTPException(status_code=400, detail="Invalid OTP")
-    if datetime.fromisoformat(otp_doc["expires"]) < datetime.now(timezone.utc):
-        raise HTTPException(status_code=400, detail="OTP expired")
+    await enforce_rate_limit("otp_verify", request, data.email)
+    if not await consume_otp(data.email, "password_reset", data.otp):
+        raise HTTPException(status_code=400, detail="Invalid or expired OTP")
     
-    new_password_hash = hash_password(data.new_password)
+    new_password_hash = await hash_password(data.new_password)
     
     if data.user_type == "admin":
-        result = await db.admins.update_one(
+        account = await db.admins.find_one_and_update(
             {"email": data.email}, 
-            {"$set": {"password": new_password_hash}}
+            {"$set": {"password": new_password_hash}},
+            projection={"_id": 0, "id": 1}
         )
     else:
-        result = await db.users.update_one(
+        account = await db.users.find_one_and_update(
             {"email": data.email}, 
-            {"$set": {"password": new_password_hash}}
+            {"$set": {"password": new_password_hash}},
+            projection={"_id": 0, "id": 1}
         )
     
-    if result.modified_count == 0:
+    if not account:
         raise HTTPException(status_code=404, detail="User not found")
-    
-    await db.otp_codes.delete_many({"email": data.email, "type": "password_reset"})
+    # Sign out every session that used the old password
+    await bump_token_version(f"{'admin' if data.user_type == 'admin' else 'user'}:{account['id']}")
     logger.info(f"Password reset successful for {data.email}")
     return {"message": "Password reset successful"}
 
 @api_router.post("/admin/resend-otp")
-async def resend_admin_otp(data: AdminOTPRequest):
-    """Resend OTP for admin registration"""
-    otp = generate_otp()
-    expires = datetime.now(timezone.utc) + timedelta(minutes=10)
-    
-    await db.otp_codes.delete_many({"email": data.email, "type": {"$ne": "password_reset"}})
-    await db.otp_codes.insert_one({"email": data.email, "otp": otp, "expires": expires.isoformat()})
-    
-    html = f"""
-    <div style="font-family: 'Segoe UI', sans-serif; max-width: 600px; margin: 0 auto; background: linear-gradient(135deg, #0a1a1f 0%, #0d2229 100%); color: white; border-radius: 16px; overflow: hidden;">
-        <div style="background: linear-gradient(135deg, #00d4d4 0%, #14b8a6 100%); padding: 30px; text-align: center;">
-            <h1 style="margin: 0; color: black; font-size: 28px;">Verification Code</h1>
-        </div>
-        <div style="padding: 30px; text-align: center;">
-            <p style="color: rgba(255,255,255,0.8); font-size: 16px;">Here's your new verification code:</p>
-            <h1 style="color: #00d4d4; letter-spacing: 10px; font-size: 48px; margin: 20px 0;">{otp}</h1>
-            <p style="color: rgba(255,255,255,0.5); font-size: 14px;">This code expires in 10 minutes.</p>
-        </div>
-    </div>
-    """
-    await send_email(data.email, "New OTP - Hogwarts Music Studio", html)
-    logger.info(f"OTP resent to {data.email}")
-    return {"message": "OTP resent to email"}
+async def resend_admin_otp(data: AdminOTPRequest, request: Request):
+    """Resend OTP for admin registration. Goes through the same checks and routing as the
+    first request, so codes for other emails still only reach the super admin."""
+    return await request_admin_otp(data, request)
 
 # =========================
 # ADMIN MANAGEMENT (Super Admin Only)
@@ -887,6 +2594,8 @@ async def update_admin_access(admin_id: str, data: AdminAccessUpdate, super_admi
         raise HTTPException(status_code=400, detail="Invalid access level")
     
     await db.admins.update_one({"id": admin_id}, {"$set": {"access_level": data.access_level}})
+    invalidate_admin_principal(admin_id)
+    await bump_token_version(f"admin:{admin_id}")
     return {"message": f"Access updated to {data.access_level}", "admin_id": admin_id}
 
 @api_router.delete("/admin/{admin_id}")
@@ -897,6 +2606,8 @@ async def delete_admin(admin_id: str, super_admin: dict = Depends(get_super_admi
     if admin.get("email") == SUPER_ADMIN_EMAIL:
         raise HTTPException(status_code=400, detail="Cannot delete super admin")
     await db.admins.delete_one({"id": admin_id})
+    invalidate_admin_principal(admin_id)
+    await bump_token_version(f"admin:{admin_id}")
     return {"message": "Admin deleted"}
 
 @api_router.put("/admin/{admin_id}/suspend")
@@ -915,9 +2626,164 @@ async def suspend_admin(admin_id: str, data: AdminSuspendUpdate, super_admin: di
         update_data["suspension_reason"] = None
     
     await db.admins.update_one({"id": admin_id}, {"$set": update_data})
+    invalidate_admin_principal(admin_id)
+    if data.suspended:
+        await bump_token_version(f"admin:{admin_id}")
     action = "suspended" if data.suspended else "unsuspended"
     return {"message": f"Admin {action} successfully", "admin_id": admin_id}
 
+# =========================
+# PUBLIC CONTENT CACHE
+# =========================
+
+# Serialized response bodies for the public read endpoints, keyed by (group, variant).
+# Each admin mutation handler invalidates its group before returning; the TTL bounds
+# how long another worker process can serve a body from before an edit.
+PUBLIC_CACHE_TTL = int(os.environ.get('PUBLIC_CACHE_TTL', 60))
+PUBLIC_CACHE_GROUPS = ("content", "contact", "settings", "services", "projects")
+# The combined /bootstrap payload depends on every group
+PUBLIC_CACHE_KEYS = PUBLIC_CACHE_GROUPS + ("bootstrap",)
+
+# Browser/CDN policy for the public JSON. The default makes clients revalidate every time
+# (a cheap 304 while nothing changed) so admin edits show up immediately; deployments
+# behind a CDN can allow reuse, e.g. "public, max-age=30, s-maxage=300, stale-while-revalidate=600".
+# PUBLIC_CACHE_CONTROL_<GROUP> (e.g. PUBLIC_CACHE_CONTROL_PROJECTS) overrides one group.
+PUBLIC_CACHE_CONTROL = os.environ.get('PUBLIC_CACHE_CONTROL', 'public, no-cache')
+PUBLIC_CACHE_POLICIES = {
+    group: os.environ.get(f'PUBLIC_CACHE_CONTROL_{group.upper()}', PUBLIC_CACHE_CONTROL)
+    for group in PUBLIC_CACHE_KEYS
+}
+
+# Bounded because sparse fieldsets (?fields=) let clients create arbitrary keys
+PUBLIC_CACHE_MAX_ENTRIES = int(os.environ.get('PUBLIC_CACHE_MAX_ENTRIES', 256))
+
+_public_cache = LRUCache(maxsize=PUBLIC_CACHE_MAX_ENTRIES)
+_public_cache_builds: dict = {}
+# Bumped on invalidation so a build that raced with an edit isn't stored
+_public_cache_generation = {group: 0 for group in PUBLIC_CACHE_KEYS}
+public_cache_stats = {"hits": 0, "misses": 0, "invalidations": 0, "not_modified": 0}
+
+def invalidate_public_cache(*groups: str):
+    """Drop cached bodies for the given groups (all groups when none are given)"""
+    for group in {*(groups or PUBLIC_CACHE_GROUPS), "bootstrap"}:
+        _public_cache_generation[group] += 1
+        for key in [key for key in _public_cache if key[0] == group]:
+            _public_cache.pop(key, None)
+        # Requests from here on must not join a build that read the data before the edit
+        for key in [key for key in _public_cache_builds if key[0] == group]:
+            _public_cache_builds.pop(key, None)
+    public_cache_stats["invalidations"] += 1
+
+def content_etag(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+async def cached_public_body(key: tuple, build, raw: bool = False) -> tuple:
+    """Returns (body, etag) for a cache key, building it on a miss. With raw=True,
+    build returns the serialized bytes itself."""
+    entry = _public_cache.get(key)
+    if entry and entry[2] > time.monotonic():
+        public_cache_stats["hits"] += 1
+        return entry[0], entry[1]
+    public_cache_stats["misses"] += 1
+
+    # Concurrent misses for the same key share one database read
+    job = _public_cache_builds.get(key)
+    if job is None:
+        generation = _public_cache_generation[key[0]]
+
+        async def run():
+            body = await build() if raw else dumps_json(await build())
+            etag = content_etag(body)
+            if _public_cache_generation[key[0]] == generation:
+                _public_cache[key] = (body, etag, time.monotonic() + PUBLIC_CACHE_TTL)
+            return body, etag
+
+        def forget(done):
+            # Only if an invalidation hasn't already replaced it with a newer build
+            if _public_cache_builds.get(key) is done:
+                del _public_cache_builds[key]
+
+        job = asyncio.ensure_future(run())
+        _public_cache_builds[key] = job
+        job.add_done_callback(forget)
+    return await asyncio.shield(job)
+
+async def cached_public_response(request: Request, key: tuple, build, raw: bool = False) -> Response:
+    body, etag = await cached_public_body(key, build, raw)
+    headers = {"ETag": etag, "Cache-Control": PUBLIC_CACHE_POLICIES[key[0]]}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, etag):
+        public_cache_stats["not_modified"] += 1
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def public_cache_report() -> dict:
+    return {
+        **public_cache_stats,
+        "entries": len(_public_cache),
+        "bytes": sum(len(entry[0]) for entry in _public_cache.values()),
+        "ttl": PUBLIC_CACHE_TTL,
+        "policies": PUBLIC_CACHE_POLICIES,
+    }
+
+# =========================
+# DATA ACCESS
+# =========================
+
+# Mutating handlers answer with the document they wrote, without reading it back: inserts
+# return the in-memory document, $set updates merge the pre-image returned by the same
+# find_one_and_update with the fields they set.
+DOC_PROJECTION = {"_id": 0}
+
+async def insert_document(collection: str, doc: dict) -> dict:
+    await db[collection].insert_one(doc)
+    # insert_one adds the generated ObjectId to the dict
+    doc.pop("_id", None)
+    return doc
+
+async def set_document_fields(collection: str, query: dict, update_data: dict, upsert: bool = False) -> tuple:
+    """$set update_data on one document. Returns (before, after); before is None when an upsert
+    created the document, both are None when nothing matched."""
+    before = await db[collection].find_one_and_update(query, {"$set": update_data}, projection=DOC_PROJECTION, upsert=upsert)
+    if before is None and not upsert:
+        return None, None
+    # An upsert builds the new document from the query's equality fields plus the $set
+    return before, {**(before or query), **update_data}
+
+# =========================
+# SPARSE FIELDSETS
+# =========================
+
+# ?fields=a,b,c (and ?sections= for site content) turn into a Mongo projection, and the
+# parsed tuple becomes part of the cache key. None means the whole document.
+SPARSE_FIELD_NAME = re.compile(r"^[A-Za-z][A-Za-z0-9_]{0,63}$")
+MAX_SPARSE_FIELDS = 200
+
+def parse_sparse_fields(fields: Optional[str], sections: Optional[str] = None) -> Optional[tuple]:
+    names = set()
+    for name in filter(None, (f.strip() for f in (fields or "").split(","))):
+        if not SPARSE_FIELD_NAME.match(name):
+            raise HTTPException(status_code=400, detail=f"Invalid field name: {name[:64]}")
+        names.add(name)
+    for section in filter(None, (s.strip() for s in (sections or "").split(","))):
+        if section not in SITE_CONTENT_SECTIONS:
+            raise HTTPException(status_code=400, detail=f"Unknown section {section[:64]}, expected one of: {', '.join(SITE_CONTENT_SECTIONS)}")
+        names.update(SITE_CONTENT_SECTIONS[section])
+    if len(names) > MAX_SPARSE_FIELDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_SPARSE_FIELDS} fields can be selected")
+    return tuple(sorted(names)) if names else None
+
+def sparse_projection(fields: Optional[tuple]) -> dict:
+    if fields is None:
+        return {"_id": 0}
+    # id always comes along so list items stay addressable
+    return {"_id": 0, "id": 1, **{name: 1 for name in fields}}
+
+def pick_fields(doc: dict, fields: Optional[tuple]) -> dict:
+    if fields is None:
+        return doc
+    return {key: value for key, value in doc.items() if key == "id" or key in fields}
+
 # =========================
 # CONTACT INFO & SITE CONTENT
 # =========================
@@ -1078,14 +2944,34 @@ DEFAULT_SITE_CONTENT = {
     "booking_subtitle": "No account required. Fill out the form and we'll handle the rest.",
 }
 
+async def load_contact_info() -> dict:
+    return await db.contact_info.find_one({"id": "contact"}, {"_id": 0}) or DEFAULT_CONTACT_INFO
+
+# Named groups of SiteContentUpdate fields, selectable with ?sections= on /settings/content
+SITE_CONTENT_SECTION_PREFIXES = {
+    "logo": ("logo_",),
+    "navbar": ("navbar_", "nav_"),
+    "hero": ("hero_",),
+    "services": ("services_",),
+    "projects": ("projects_",),
+    "about": ("about_", "timeline_"),
+    "founder": ("founder_",),
+    "stats": ("stat1_", "stat2_", "stat3_"),
+    "cta": ("cta_",),
+    "careers": ("careers_", "app_"),
+    "applications": ("applications_",),
+    "footer": ("footer_", "copyright_"),
+    "booking": ("booking_",),
+}
+SITE_CONTENT_SECTIONS = {
+    section: tuple(name for name in SiteContentUpdate.model_fields if name.startswith(prefixes))
+    for section, prefixes in SITE_CONTENT_SECTION_PREFIXES.items()
+}
+
 @api_router.get("/settings/contact")
-async def get_contact_info():
+async def get_contact_info(request: Request):
     """Get contact information (public)"""
-    contact = await db.contact_info.find_one({"id": "contact"}, {"_id": 0})
-    if not contact:
-        await db.contact_info.insert_one(DEFAULT_CONTACT_INFO.copy())
-        return DEFAULT_CONTACT_INFO
-    return contact
+    return await cached_public_response(request, ("contact",), load_contact_info)
 
 @api_router.put("/settings/contact")
 async def update_contact_info(data: ContactInfoUpdate, admin: dict = Depends(get_super_admin)):
@@ -1094,19 +2980,25 @@ async def update_contact_info(data: ContactInfoUpdate, admin: dict = Depends(get
     if not update_data:
         raise HTTPException(status_code=400, detail="No update data")
     
-    await db.contact_info.update_one({"id": "contact"}, {"$set": update_data}, upsert=True)
-    updated = await db.contact_info.find_one({"id": "contact"}, {"_id": 0})
+    _, updated = await set_document_fields("contact_info", {"id": "contact"}, update_data, upsert=True)
+    invalidate_public_cache("contact")
     return updated
 
-@api_router.get("/settings/content")
-async def get_site_content():
-    """Get all site content/text (public)"""
-    content = await db.site_content.find_one({"id": "content"}, {"_id": 0})
+async def load_site_content(meta: bool = False, fields: Optional[tuple] = None) -> dict:
+    content = await db.site_content.find_one({"id": "content"}, sparse_projection(fields))
     if not content:
-        await db.site_content.insert_one(DEFAULT_SITE_CONTENT.copy())
-        return DEFAULT_SITE_CONTENT
+        content = pick_fields(DEFAULT_SITE_CONTENT.copy(), fields)
+    if meta:
+        await attach_upload_meta([content])
     return content
 
+@api_router.get("/settings/content")
+async def get_site_content(request: Request, meta: bool = False, fields: Optional[str] = None, sections: Optional[str] = None):
+    """Get all site content/text (public). meta=true adds upload metadata next to upload URLs.
+    fields= and sections= (e.g. sections=hero,footer) limit the response to those keys."""
+    selected = parse_sparse_fields(fields, sections)
+    return await cached_public_response(request, ("content", meta, selected), lambda: load_site_content(meta, selected))
+
 @api_router.put("/settings/content")
 async def update_site_content(data: SiteContentUpdate, admin: dict = Depends(get_super_admin)):
     """Update site content/text (Super admin only)"""
@@ -1114,8 +3006,9 @@ async def update_site_content(data: SiteContentUpdate, admin: dict = Depends(get
     if not update_data:
         raise HTTPException(status_code=400, detail="No update data")
     
-    await db.site_content.update_one({"id": "content"}, {"$set": update_data}, upsert=True)
-    updated = await db.site_content.find_one({"id": "content"}, {"_id": 0})
+    before, updated = await set_document_fields("site_content", {"id": "content"}, update_data, upsert=True)
+    invalidate_public_cache("content")
+    await sync_upload_refs(before, updated)
     return updated
 
 # =========================
@@ -1140,13 +3033,12 @@ DEFAULT_SETTINGS = {
     "cta_subtitle": "Let's bring your audio vision to life. Book a session today."
 }
 
+async def load_site_settings() -> dict:
+    return await db.site_settings.find_one({"id": "main"}, {"_id": 0}) or DEFAULT_SETTINGS
+
 @api_router.get("/settings/site")
-async def get_site_settings():
-    settings = await db.site_settings.find_one({"id": "main"}, {"_id": 0})
-    if not settings:
-        await db.site_settings.insert_one(DEFAULT_SETTINGS.copy())
-        return DEFAULT_SETTINGS
-    return settings
+async def get_site_settings(request: Request):
+    return await cached_public_response(request, ("settings",), load_site_settings)
 
 @api_router.put("/settings/site")
 async def update_site_settings(settings: SiteSettingsUpdate, admin: dict = Depends(get_super_admin)):
@@ -1154,8 +3046,9 @@ async def update_site_settings(settings: SiteSettingsUpdate, admin: dict = Depen
     if not update_data:
         raise HTTPException(status_code=400, detail="No update data")
     
-    await db.site_settings.update_one({"id": "main"}, {"$set": update_data}, upsert=True)
-    updated = await db.site_settings.find_one({"id": "main"}, {"_id": 0})
+    before, updated = await set_document_fields("site_settings", {"id": "main"}, update_data, upsert=True)
+    invalidate_public_cache("settings")
+    await sync_upload_refs(before, updated)
     return updated
 
 # =========================
@@ -1163,23 +3056,25 @@ async def update_site_settings(settings: SiteSettingsUpdate, admin: dict = Depen
 # =========================
 
 DEFAULT_SERVICES = [
-    {"id": str(uuid.uuid4()), "name": "Dubbing", "description": "Professional voice-over and dubbing services for films, series, and content.", "price": "₹299/hr", "price_type": "fixed", "icon": "mic-vocal", "image_url": "https://images.unsplash.com/photo-1598653222000-6b7b7a552625?auto=format&fit=crop&q=80", "requires_hours": True, "created_at": datetime.now(timezone.utc).isoformat()},
-    {"id": str(uuid.uuid4()), "name": "Vocal Recording", "description": "Crystal-clear vocal recording in our acoustically treated studio.", "price": "₹399/hr", "price_type": "fixed", "icon": "mic", "image_url": "https://images.unsplash.com/photo-1558618666-fcd25c85cd64?auto=format&fit=crop&q=80", "requires_hours": True, "created_at": datetime.now(timezone.utc).isoformat()},
-    {"id": str(uuid.uuid4()), "name": "Mixing", "description": "Expert audio mixing to achieve the perfect balance and clarity.", "price": None, "price_type": "project", "icon": "sliders", "image_url": "https://images.unsplash.com/photo-1563330232-57114bb0823c?auto=format&fit=crop&q=80", "requires_hours": False, "created_at": datetime.now(timezone.utc).isoformat()},
-    {"id": str(uuid.uuid4()), "name": "Mastering", "description": "Final polish and optimization for distribution-ready audio.", "price": None, "price_type": "project", "icon": "disc", "image_url": "https://images.unsplash.com/photo-1571330735066-03aaa9429d89?auto=format&fit=crop&q=80", "requires_hours": False, "created_at": datetime.now(timezone.utc).isoformat()},
-    {"id": str(uuid.uuid4()), "name": "SFX & Foley", "description": "Custom sound effects and foley artistry for immersive audio.", "price": None, "price_type": "project", "icon": "volume-2", "image_url": "https://images.unsplash.com/photo-1511379938547-c1f69419868d?auto=format&fit=crop&q=80", "requires_hours": False, "created_at": datetime.now(timezone.utc).isoformat()},
-    {"id": str(uuid.uuid4()), "name": "Music Production", "description": "Full-scale music production from composition to final master.", "price": None, "price_type": "project", "icon": "music", "image_url": "https://images.unsplash.com/photo-1493225255756-d9584f8606e9?auto=format&fit=crop&q=80", "requires_hours": False, "created_at": datetime.now(timezone.utc).isoformat()}
+    {"name": "Dubbing", "description": "Professional voice-over and dubbing services for films, series, and content.", "price": "₹299/hr", "price_type": "fixed", "icon": "mic-vocal", "image_url": "https://images.unsplash.com/photo-1598653222000-6b7b7a552625?auto=format&fit=crop&q=80", "requires_hours": True, "created_at": datetime.now(timezone.utc).isoformat()},
+    {"name": "Vocal Recording", "description": "Crystal-clear vocal recording in our acoustically treated studio.", "price": "₹399/hr", "price_type": "fixed", "icon": "mic", "image_url": "https://images.unsplash.com/photo-1558618666-fcd25c85cd64?auto=format&fit=crop&q=80", "requires_hours": True, "created_at": datetime.now(timezone.utc).isoformat()},
+    {"name": "Mixing", "description": "Expert audio mixing to achieve the perfect balance and clarity.", "price": None, "price_type": "project", "icon": "sliders", "image_url": "https://images.unsplash.com/photo-1563330232-57114bb0823c?auto=format&fit=crop&q=80", "requires_hours": False, "created_at": datetime.now(timezone.utc).isoformat()},
+    {"name": "Mastering", "description": "Final polish and optimization for distribution-ready audio.", "price": None, "price_type": "project", "icon": "disc", "image_url": "https://images.unsplash.com/photo-1571330735066-03aaa9429d89?auto=format&fit=crop&q=80", "requires_hours": False, "created_at": datetime.now(timezone.utc).isoformat()},
+    {"name": "SFX & Foley", "description": "Custom sound effects and foley artistry for immersive audio.", "price": None, "price_type": "project", "icon": "volume-2", "image_url": "https://images.unsplash.com/photo-1511379938547-c1f69419868d?auto=format&fit=crop&q=80", "requires_hours": False, "created_at": datetime.now(timezone.utc).isoformat()},
+    {"name": "Music Production", "description": "Full-scale music production from composition to final master.", "price": None, "price_type": "project", "icon": "music", "image_url": "https://images.unsplash.com/photo-1493225255756-d9584f8606e9?auto=format&fit=crop&q=80", "requires_hours": False, "created_at": datetime.now(timezone.utc).isoformat()}
 ]
 
-@api_router.get("/services")
-async def get_services():
-    services = await db.services.find({}, {"_id": 0}).to_list(100)
-    if not services:
-        for s in DEFAULT_SERVICES:
-            await db.services.insert_one(s.copy())
-        services = DEFAULT_SERVICES
+async def load_services(meta: bool = False, fields: Optional[tuple] = None) -> list:
+    services = await db.services.find({}, sparse_projection(fields)).to_list(100)
+    if meta:
+        await attach_upload_meta(services)
     return services
 
+@api_router.get("/services")
+async def get_services(request: Request, meta: bool = False, fields: Optional[str] = None):
+    selected = parse_sparse_fields(fields)
+    return await cached_public_response(request, ("services", meta, selected), lambda: load_services(meta, selected))
+
 @api_router.post("/services")
 async def create_service(service: ServiceCreate, admin: dict = Depends(get_admin_with_full_access)):
     service_doc = {
@@ -1187,24 +3082,30 @@ async def create_service(service: ServiceCreate, admin: dict = Depends(get_admin
         **service.model_dump(),
         "created_at": datetime.now(timezone.utc).isoformat()
     }
-    await db.services.insert_one(service_doc)
-    return await db.services.find_one({"id": service_doc["id"]}, {"_id": 0})
+    await insert_document("services", service_doc)
+    invalidate_public_cache("services")
+    await sync_upload_refs(None, service_doc)
+    return service_doc
 
 @api_router.put("/services/{service_id}")
 async def update_service(service_id: str, service: ServiceUpdate, admin: dict = Depends(get_admin_with_full_access)):
     update_data = {k: v for k, v in service.model_dump().items() if v is not None}
     if not update_data:
         raise HTTPException(status_code=400, detail="No update data")
-    result = await db.services.update_one({"id": service_id}, {"$set": update_data})
-    if result.matched_count == 0:
+    before, updated = await set_document_fields("services", {"id": service_id}, update_data)
+    if not before:
         raise HTTPException(status_code=404, detail="Service not found")
-    return await db.services.find_one({"id": service_id}, {"_id": 0})
+    invalidate_public_cache("services")
+    await sync_upload_refs(before, updated)
+    return updated
 
 @api_router.delete("/services/{service_id}")
 async def delete_service(service_id: str, admin: dict = Depends(get_admin_with_full_access)):
-    result = await db.services.delete_one({"id": service_id})
-    if result.deleted_count == 0:
+    deleted = await db.services.find_one_and_delete({"id": service_id}, projection={"_id": 0})
+    if not deleted:
         raise HTTPException(status_code=404, detail="Service not found")
+    invalidate_public_cache("services")
+    await sync_upload_refs(deleted, None)
     return {"message": "Service deleted"}
 
 # =========================
@@ -1212,22 +3113,24 @@ async def delete_service(service_id: str, admin: dict = Depends(get_admin_with_f
 # =========================
 
 DEFAULT_PROJECTS = [
-    {"id": str(uuid.uuid4()), "name": "The Midnight Chronicles", "description": "Complete audio post-production for an indie feature film.", "work_type": "Mixing & Mastering", "image_url": "https://images.unsplash.com/photo-1598488035139-bdbb2231ce04?auto=format&fit=crop&q=80", "featured": True, "created_at": datetime.now(timezone.utc).isoformat()},
-    {"id": str(uuid.uuid4()), "name": "Echoes of Tomorrow", "description": "Original soundtrack composition and production.", "work_type": "Music Production", "image_url": "https://images.unsplash.com/photo-1514320291840-2e0a9bf2a9ae?auto=format&fit=crop&q=80", "featured": True, "created_at": datetime.now(timezone.utc).isoformat()},
-    {"id": str(uuid.uuid4()), "name": "Voice of India", "description": "Hindi dubbing for international documentary series.", "work_type": "Dubbing", "image_url": "https://images.unsplash.com/photo-1511671782779-c97d3d27a1d4?auto=format&fit=crop&q=80", "featured": True, "created_at": datetime.now(timezone.utc).isoformat()},
-    {"id": str(uuid.uuid4()), "name": "Neon Dreams Album", "description": "Full album production for electronic music artist.", "work_type": "Music Production", "image_url": "https://images.unsplash.com/photo-1493225255756-d9584f8606e9?auto=format&fit=crop&q=80", "featured": True, "created_at": datetime.now(timezone.utc).isoformat()},
-    {"id": str(uuid.uuid4()), "name": "Horror Soundscapes", "description": "Custom SFX and foley for horror game.", "work_type": "SFX & Foley", "image_url": "https://images.unsplash.com/photo-1470225620780-dba8ba36b745?auto=format&fit=crop&q=80", "featured": True, "created_at": datetime.now(timezone.utc).isoformat()}
+    {"name": "The Midnight Chronicles", "description": "Complete audio post-production for an indie feature film.", "work_type": "Mixing & Mastering", "image_url": "https://images.unsplash.com/photo-1598488035139-bdbb2231ce04?auto=format&fit=crop&q=80", "featured": True, "created_at": datetime.now(timezone.utc).isoformat()},
+    {"name": "Echoes of Tomorrow", "description": "Original soundtrack composition and production.", "work_type": "Music Production", "image_url": "https://images.unsplash.com/photo-1514320291840-2e0a9bf2a9ae?auto=format&fit=crop&q=80", "featured": True, "created_at": datetime.now(timezone.utc).isoformat()},
+    {"name": "Voice of India", "description": "Hindi dubbing for international documentary series.", "work_type": "Dubbing", "image_url": "https://images.unsplash.com/photo-1511671782779-c97d3d27a1d4?auto=format&fit=crop&q=80", "featured": True, "created_at": datetime.now(timezone.utc).isoformat()},
+    {"name": "Neon Dreams Album", "description": "Full album production for electronic music artist.", "work_type": "Music Production", "image_url": "https://images.unsplash.com/photo-1493225255756-d9584f8606e9?auto=format&fit=crop&q=80", "featured": True, "created_at": datetime.now(timezone.utc).isoformat()},
+    {"name": "Horror Soundscapes", "description": "Custom SFX and foley for horror game.", "work_type": "SFX & Foley", "image_url": "https://images.unsplash.com/photo-1470225620780-dba8ba36b745?auto=format&fit=crop&q=80", "featured": True, "created_at": datetime.now(timezone.utc).isoformat()}
 ]
 
-@api_router.get("/projects")
-async def get_projects():
-    projects = await db.projects.find({}, {"_id": 0}).to_list(100)
-    if not projects:
-        for p in DEFAULT_PROJECTS:
-            await db.projects.insert_one(p.copy())
-        projects = DEFAULT_PROJECTS
+async def load_projects(meta: bool = False, fields: Optional[tuple] = None) -> list:
+    projects = await db.projects.find({}, sparse_projection(fields)).to_list(100)
+    if meta:
+        await attach_upload_meta(projects)
     return projects
 
+@api_router.get("/projects")
+async def get_projects(request: Request, meta: bool = False, fields: Optional[str] = None):
+    selected = parse_sparse_fields(fields)
+    return await cached_public_response(request, ("projects", meta, selected), lambda: load_projects(meta, selected))
+
 @api_router.post("/projects")
 async def create_project(project: ProjectCreate, admin: dict = Depends(get_admin_with_full_access)):
     project_doc = {
@@ -1235,40 +3138,128 @@ async def create_project(project: ProjectCreate, admin: dict = Depends(get_admin
         **project.model_dump(),
         "created_at": datetime.now(timezone.utc).isoformat()
     }
-    await db.projects.insert_one(project_doc)
-    return await db.projects.find_one({"id": project_doc["id"]}, {"_id": 0})
+    await insert_document("projects", project_doc)
+    invalidate_public_cache("projects")
+    await sync_upload_refs(None, project_doc)
+    return project_doc
 
 @api_router.put("/projects/{project_id}")
 async def update_project(project_id: str, project: ProjectUpdate, admin: dict = Depends(get_admin_with_full_access)):
     update_data = {k: v for k, v in project.model_dump().items() if v is not None}
     if not update_data:
         raise HTTPException(status_code=400, detail="No update data")
-    result = await db.projects.update_one({"id": project_id}, {"$set": update_data})
-    if result.matched_count == 0:
+    before, updated = await set_document_fields("projects", {"id": project_id}, update_data)
+    if not before:
         raise HTTPException(status_code=404, detail="Project not found")
-    return await db.projects.find_one({"id": project_id}, {"_id": 0})
+    invalidate_public_cache("projects")
+    await sync_upload_refs(before, updated)
+    return updated
 
 @api_router.delete("/projects/{project_id}")
 async def delete_project(project_id: str, admin: dict = Depends(get_admin_with_full_access)):
-    result = await db.projects.delete_one({"id": project_id})
-    if result.deleted_count == 0:
+    deleted = await db.projects.find_one_and_delete({"id": project_id}, projection={"_id": 0})
+    if not deleted:
         raise HTTPException(status_code=404, detail="Project not found")
+    invalidate_public_cache("projects")
+    await sync_upload_refs(deleted, None)
     return {"message": "Project deleted"}
 
+# =========================
+# DEFAULT DATA
+# =========================
+
+async def seed_singleton(collection: str, default: dict):
+    try:
+        await db[collection].update_one({"id": default["id"]}, {"$setOnInsert": default.copy()}, upsert=True)
+    except DuplicateKeyError:
+        # Another worker inserted it between our match and insert
+        pass
+
+DEFAULT_DATA_NAMESPACE = uuid.UUID("7f3c2a9e-5b1d-4e8a-9c6f-2d4b8e1a0f37")
+
+def default_doc_id(collection: str, name: str) -> str:
+    """Same id in every worker, so concurrent seeding upserts hit the unique id index"""
+    return str(uuid.uuid5(DEFAULT_DATA_NAMESPACE, f"{collection}:{name}"))
+
+async def seed_collection(collection: str, defaults: list):
+    """Insert the defaults into an empty collection, once per database: if an admin later
+    deletes them all, they stay deleted. Workers that both find the collection empty upsert
+    the same ids, and the unique id index keeps them from inserting duplicates."""
+    marker = f"{collection}_seeded"
+    if await db.maintenance.find_one({"_id": marker}):
+        return
+    if not await db[collection].find_one({}, {"_id": 1}):
+        requests = []
+        for doc in defaults:
+            doc_id = default_doc_id(collection, doc["name"])
+            requests.append(UpdateOne({"id": doc_id}, {"$setOnInsert": {**doc, "id": doc_id}}, upsert=True))
+        try:
+            result = await db[collection].bulk_write(requests, ordered=False)
+            if result.upserted_count:
+                logger.info(f"Seeded {result.upserted_count} default {collection}")
+        except BulkWriteError as e:
+            # Another worker inserted some of them between our match and insert
+            if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                raise
+    await db.maintenance.update_one(
+        {"_id": marker},
+        {"$setOnInsert": {"at": datetime.now(timezone.utc).isoformat()}},
+        upsert=True
+    )
+
+async def seed_default_data():
+    """Runs once at startup so the public GET handlers are pure reads"""
+    await asyncio.gather(
+        seed_singleton("contact_info", DEFAULT_CONTACT_INFO),
+        seed_singleton("site_content", DEFAULT_SITE_CONTENT),
+        seed_singleton("site_settings", DEFAULT_SETTINGS),
+        seed_collection("services", DEFAULT_SERVICES),
+        seed_collection("projects", DEFAULT_PROJECTS),
+    )
+
+# =========================
+# BOOTSTRAP
+# =========================
+
+def bootstrap_parts(meta: bool) -> dict:
+    """Cache key and loader per part, the same ones the individual endpoints use"""
+    return {
+        "content": (("content", meta, None), lambda: load_site_content(meta)),
+        "contact": (("contact",), load_contact_info),
+        "settings": (("settings",), load_site_settings),
+        "services": (("services", meta, None), lambda: load_services(meta)),
+        "projects": (("projects", meta, None), lambda: load_projects(meta)),
+    }
+
+async def build_bootstrap(meta: bool = False) -> bytes:
+    """Splice the cached per-endpoint bodies into one object; nothing is re-serialized."""
+    parts = bootstrap_parts(meta)
+    cached = await asyncio.gather(*(cached_public_body(key, load) for key, load in parts.values()))
+    # Changes whenever any part changes, so clients can key their own caches on it
+    version = hashlib.blake2b(b"".join(etag.encode() for _, etag in cached), digest_size=16).hexdigest()
+    fields = [b'"version":' + dumps_json(version)]
+    fields += [dumps_json(name) + b":" + body for name, (body, _) in zip(parts, cached)]
+    return b"{" + b",".join(fields) + b"}"
+
+@api_router.get("/bootstrap")
+async def get_bootstrap(request: Request, meta: bool = False):
+    """Site content, contact info, settings, services and projects in one response (public)"""
+    return await cached_public_response(request, ("bootstrap", meta), lambda: build_bootstrap(meta), raw=True)
+
 # =========================
 # BOOKINGS
 # =========================
 
 @api_router.post("/bookings")
-async def create_booking(booking: BookingCreate):
+async def create_booking(booking: BookingCreate, request: Request):
+    await enforce_rate_limit("booking", request)
     booking_doc = {
         "id": str(uuid.uuid4()),
         **booking.model_dump(),
         "status": "pending",
         "created_at": datetime.now(timezone.utc).isoformat()
     }
-    await db.bookings.insert_one(booking_doc)
-    inserted = await db.bookings.find_one({"id": booking_doc["id"]}, {"_id": 0})
+    inserted = await insert_document("bookings", booking_doc)
     
     # Send emails
     await send_booking_confirmation(inserted)
@@ -1277,17 +3268,17 @@ async def create_booking(booking: BookingCreate):
     return {"message": "Booking created successfully", "booking": inserted}
 
 @api_router.get("/bookings")
-async def get_all_bookings(admin: dict = Depends(get_current_admin)):
-    bookings = await db.bookings.find({}, {"_id": 0}).sort("created_at", -1).to_list(1000)
-    return bookings
+async def get_all_bookings(admin: dict = Depends(get_current_admin), fields: Optional[str] = None):
+    bookings = await db.bookings.find({}, sparse_projection(parse_sparse_fields(fields))).sort("created_at", -1).to_list(1000)
+    return FastJSONResponse(bookings)
 
 @api_router.get("/bookings/user")
-async def get_user_bookings(current_user: dict = Depends(get_current_user)):
+async def get_user_bookings(current_user: dict = Depends(get_current_user), fields: Optional[str] = None):
     user = await db.users.find_one({"id": current_user.get("user_id")}, {"_id": 0})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    bookings = await db.bookings.find({"email": user["email"]}, {"_id": 0}).sort("created_at", -1).to_list(100)
-    return bookings
+    bookings = await db.bookings.find({"email": user["email"]}, sparse_projection(parse_sparse_fields(fields))).sort("created_at", -1).to_list(100)
+    return FastJSONResponse(bookings)
 
 @api_router.get("/bookings/track/{booking_id}")
 async def track_booking(booking_id: str, email: str):
@@ -1299,12 +3290,10 @@ async def track_booking(booking_id: str, email: str):
 
 @api_router.put("/bookings/{booking_id}/status")
 async def update_booking_status(booking_id: str, status_update: BookingStatusUpdate, admin: dict = Depends(get_current_admin)):
-    result = await db.bookings.update_one({"id": booking_id}, {"$set": {"status": status_update.status}})
-    if result.matched_count == 0:
+    _, updated = await set_document_fields("bookings", {"id": booking_id}, {"status": status_update.status})
+    if not updated:
         raise HTTPException(status_code=404, detail="Booking not found")
     
-    updated = await db.bookings.find_one({"id": booking_id}, {"_id": 0})
-    
     # Send status update email to client
     await send_booking_status_update(updated)
     
@@ -1322,8 +3311,9 @@ async def delete_booking(booking_id: str, admin: dict = Depends(get_current_admi
 # =========================
 
 @api_router.post("/applications")
-async def submit_application(data: JobApplicationCreate):
+async def submit_application(data: JobApplicationCreate, request: Request):
     """Submit a job application (public)"""
+    await enforce_rate_limit("application", request)
     application = {
         "id": str(uuid.uuid4()),
         "name": data.name,
@@ -1333,10 +3323,12 @@ async def submit_application(data: JobApplicationCreate):
         "position_type": data.position_type,
         "note": data.note,
         "portfolio_url": data.portfolio_url,
+        "cv_filename": data.cv_filename if is_cv_filename(data.cv_filename) else None,
         "status": "pending",  # pending, reviewed, contacted, rejected, hired
         "created_at": datetime.now(timezone.utc).isoformat()
     }
-    await db.applications.insert_one(application)
+    await insert_document("applications", application)
+    await sync_upload_refs(None, application)
     
     # Send notification to admin
     html = f"""
@@ -1375,10 +3367,10 @@ async def submit_application(data: JobApplicationCreate):
     return {"message": "Application submitted successfully", "id": application["id"]}
 
 @api_router.get("/applications")
-async def get_applications(admin: dict = Depends(get_super_admin)):
+async def get_applications(admin: dict = Depends(get_super_admin), fields: Optional[str] = None):
     """Get all job applications (Super admin only)"""
-    applications = await db.applications.find({}, {"_id": 0}).sort("created_at", -1).to_list(200)
-    return applications
+    applications = await db.applications.find({}, sparse_projection(parse_sparse_fields(fields))).sort("created_at", -1).to_list(200)
+    return FastJSONResponse(applications)
 
 @api_router.put("/applications/{app_id}/status")
 async def update_application_status(app_id: str, status: str, admin: dict = Depends(get_super_admin)):
@@ -1466,9 +3458,10 @@ async def update_application_status(app_id: str, status: str, admin: dict = Depe
 @api_router.delete("/applications/{app_id}")
 async def delete_application(app_id: str, admin: dict = Depends(get_super_admin)):
     """Delete an application (Super admin only)"""
-    result = await db.applications.delete_one({"id": app_id})
-    if result.deleted_count == 0:
+    deleted = await db.applications.find_one_and_delete({"id": app_id}, projection={"_id": 0})
+    if not deleted:
         raise HTTPException(status_code=404, detail="Application not found")
+    await sync_upload_refs(deleted, None)
     return {"message": "Application deleted"}
 
 # =========================
@@ -1476,7 +3469,8 @@ async def delete_application(app_id: str, admin: dict = Depends(get_super_admin)
 # =========================
 
 @api_router.post("/chat")
-async def chat_with_ai(data: ChatMessage):
+async def chat_with_ai(data: ChatMessage, request: Request):
+    await enforce_rate_limit("chat", request)
     try:
         from emergentintegrations.llm.chat import LlmChat, UserMessage
         
@@ -1501,6 +3495,84 @@ Be helpful, professional, and guide users to book services. Keep responses conci
         logger.error(f"Chat error: {str(e)}")
         return {"response": f"I apologize, but I'm having trouble. Please contact us at {ADMIN_EMAIL}", "session_id": data.session_id}
 
+# =========================
+# DATABASE INDEXES
+# =========================
+
+# Every index the app relies on, applied at startup. Indexes are only ever added here;
+# anything found in the database that isn't declared is reported, never dropped.
+DB_INDEXES = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+    ],
+    "admins": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+    ],
+    "bookings": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("email", ASCENDING), ("created_at", DESCENDING)], name="email_created_at"),
+        IndexModel([("status", ASCENDING)], name="status"),
+        IndexModel([("created_at", DESCENDING)], name="created_at"),
+    ],
+    "applications": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("created_at", DESCENDING)], name="created_at"),
+    ],
+    "services": [IndexModel([("id", ASCENDING)], name="id_unique", unique=True)],
+    "projects": [IndexModel([("id", ASCENDING)], name="id_unique", unique=True)],
+    "site_content": [IndexModel([("id", ASCENDING)], name="id_unique", unique=True)],
+    "site_settings": [IndexModel([("id", ASCENDING)], name="id_unique", unique=True)],
+    "contact_info": [IndexModel([("id", ASCENDING)], name="id_unique", unique=True)],
+    "uploads": [
+        IndexModel([("filename", ASCENDING)], name="filename_unique", unique=True),
+        IndexModel([("web_filename", ASCENDING)], name="web_filename", partialFilterExpression={"web_filename": {"$type": "string"}}),
+        # Blobs indexed from disk have no digest
+        IndexModel([("sha256", ASCENDING)], name="sha256", partialFilterExpression={"sha256": {"$type": "string"}}),
+        IndexModel([("source_sha256", ASCENDING)], name="source_sha256", partialFilterExpression={"source_sha256": {"$type": "string"}}),
+    ],
+    "upload_sessions": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("expires_at", ASCENDING)], name="expires_at"),
+    ],
+    "otp_codes": [
+        IndexModel([("email", ASCENDING), ("type", ASCENDING)], name="email_type_unique", unique=True),
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "rate_limits": [IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0)],
+    "token_versions": [IndexModel([("updated_at", ASCENDING)], name="updated_at")],
+}
+
+async def ensure_indexes():
+    for collection, indexes in DB_INDEXES.items():
+        for index in indexes:
+            spec = index.document
+            try:
+                await db[collection].create_indexes([index])
+            except OperationFailure as e:
+                # Typically existing duplicates or an index with the same keys under other options
+                logger.error(f"Index {collection}.{spec['name']} not created: {e.details.get('errmsg', str(e)) if e.details else str(e)}")
+        existing = {
+            index["name"]: dict(index["key"])
+            async for index in db[collection].list_indexes()
+            if index["name"] != "_id_"
+        }
+        for index in indexes:
+            name, keys = index.document["name"], dict(index.document["key"])
+            if name in existing:
+                if existing.pop(name) != keys:
+                    logger.warning(f"Index {collection}.{name} drifted from its declared keys {keys}")
+                continue
+            other = next((other for other, other_keys in existing.items() if other_keys == keys), None)
+            if other:
+                existing.pop(other)
+                logger.warning(f"Declared index {collection}.{name} exists as {other}")
+            else:
+                logger.warning(f"Declared index {collection}.{name} is missing")
+        for name, keys in existing.items():
+            logger.warning(f"Undeclared index {collection}.{name} {keys}")
+
 # =========================
 # STATS
 # =========================
@@ -1517,12 +3589,33 @@ async def get_admin_stats(admin: dict = Depends(get_current_admin)):
         "total_admins": await db.admins.count_documents({})
     }
 
+@api_router.get("/admin/perf")
+async def get_perf_stats(admin: dict = Depends(get_super_admin)):
+    return {
+        "password_hashing": password_hash_report(),
+        "admin_cache": {**admin_cache_stats, "size": len(_admin_cache), "ttl": ADMIN_CACHE_TTL},
+        "token_versions": {"tracked": len(_token_versions)},
+        "token_cache": {**token_cache_stats, "size": len(_token_cache), "max_size": TOKEN_CACHE_SIZE},
+        "rate_limits": {"backend": RATE_LIMIT_BACKEND, "enabled": RATE_LIMIT_ENABLED, "rules": rate_limit_stats},
+        "public_cache": public_cache_report(),
+    }
+
 @api_router.get("/")
 async def root():
     return {"message": "Hogwarts Music Studio API"}
 
 app.include_router(api_router)
 
+if UPLOAD_SERVE_MODE == "static":
+    if isinstance(upload_storage, LocalUploadStorage):
+        upload_route = next(r for r in app.router.routes if getattr(r, "endpoint", None) is get_upload)
+        # Ahead of the API routes so plain file requests never reach a Python handler
+        app.router.routes.insert(0, Mount("/api/uploads", app=UploadStaticFiles(directory=UPLOAD_DIR, upload_route=upload_route)))
+    else:
+        logger.warning("UPLOAD_SERVE_MODE=static needs local upload storage; serving through get_upload")
+
+app.add_middleware(UploadBodyLimitMiddleware, limits=UPLOAD_BODY_LIMITS)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -1531,6 +3624,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+_background_tasks: list = []
+
+@app.on_event("startup")
+async def start_background_tasks():
+    await calibrate_bcrypt_rounds()
+    # Plaintext codes from before OTPs were hashed can never verify now
+    await db.otp_codes.delete_many({"otp_hash": {"$exists": False}})
+    await ensure_indexes()
+    await seed_default_data()
+    since = await load_token_versions()
+    _background_tasks.append(asyncio.create_task(token_version_sync_loop(since)))
+    _background_tasks.append(asyncio.create_task(upload_session_gc_loop()))
+    _background_tasks.append(asyncio.create_task(upload_gc_loop()))
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    for task in _background_tasks:
+        task.cancel()
     client.close()
+    _password_pool.shutdown(wait=False, cancel_futures=True)
+    if _image_pool is not None:
+        _image_pool.shutdown(wait=False, cancel_futures=True)
@@ -1,9 +1,7 @@
 import { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
 import { Mail, Phone, MapPin, Instagram, Youtube, Twitter, Zap, ExternalLink } from 'lucide-react';
-import axios from 'axios';
-
-const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
+import { fetchSiteData } from '../utils/siteData';
 
 const DEFAULT_LOGO = "https://customer-assets.emergentagent.com/job_audio-haven-21/artifacts/kjwts159_HOGWARTS%20%20white%20bg%20only%20logo%20.jpg";
 
@@ -17,12 +15,9 @@ const Footer = () => {
 
   const fetchData = async () => {
     try {
-      const [contactRes, contentRes] = await Promise.all([
-        axios.get(`${API}/settings/contact`),
-        axios.get(`${API}/settings/content`)
-      ]);
-      setContact(contactRes.data);
-      setContent(contentRes.data);
+      const data = await fetchSiteData();
+      setContact(data.contact);
+      setContent(data.content);
     } catch (error) {
       console.error('Error fetching footer data:', error);
     }
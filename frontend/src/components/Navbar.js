@@ -3,9 +3,8 @@ import { Link, useLocation } from 'react-router-dom';
 import { motion, AnimatePresence } from 'framer-motion';
 import { Menu, X, User, LogOut } from 'lucide-react';
 import { useAuth } from '../context/AuthContext';
-import axios from 'axios';
+import { fetchSiteData } from '../utils/siteData';
 
-const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
 const DEFAULT_LOGO = "https://customer-assets.emergentagent.com/job_audio-haven-21/artifacts/kjwts159_HOGWARTS%20%20white%20bg%20only%20logo%20.jpg";
 
 const Navbar = () => {
@@ -61,8 +60,8 @@ const Navbar = () => {
 
   const fetchContent = async () => {
     try {
-      const response = await axios.get(`${API}/settings/content`);
-      setContent(response.data);
+      const data = await fetchSiteData();
+      setContent(data.content);
     } catch (error) {
       console.error('Error fetching content:', error);
     }
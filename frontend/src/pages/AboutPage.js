@@ -2,9 +2,8 @@ import { useEffect, useState } from 'react';
 import { motion } from 'framer-motion';
 import { Link } from 'react-router-dom';
 import { ArrowRight, Award, Users, Clock, Headphones, Target, ExternalLink, Zap } from 'lucide-react';
-import axios from 'axios';
+import { fetchSiteData } from '../utils/siteData';
 
-const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
 const LOGO_URL = "https://customer-assets.emergentagent.com/job_audio-haven-21/artifacts/kjwts159_HOGWARTS%20%20white%20bg%20only%20logo%20.jpg";
 
 const AboutPage = () => {
@@ -16,8 +15,8 @@ const AboutPage = () => {
 
   const fetchContent = async () => {
     try {
-      const response = await axios.get(`${API}/settings/content`);
-      setContent(response.data);
+      const data = await fetchSiteData();
+      setContent(data.content);
     } catch (error) {
       console.error('Error fetching content:', error);
     }
@@ -3,6 +3,7 @@ import { motion } from 'framer-motion';
 import { Briefcase, GraduationCap, Mail, Phone, MapPin, FileText, Send, Loader2, CheckCircle, Zap, Instagram, Youtube, Upload, X } from 'lucide-react';
 import { toast } from 'sonner';
 import axios from 'axios';
+import { fetchSiteData } from '../utils/siteData';
 
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
 
@@ -34,8 +35,8 @@ const CareersPage = () => {
 
   const fetchContent = async () => {
     try {
-      const response = await axios.get(`${API}/settings/content`);
-      setContent(response.data);
+      const data = await fetchSiteData();
+      setContent(data.content);
     } catch (error) {
       console.error('Error fetching content:', error);
     }
@@ -2,10 +2,9 @@ import { useEffect, useState } from 'react';
 import { Link } from 'react-router-dom';
 import { motion } from 'framer-motion';
 import { ArrowRight, Play, Mic, Sliders, Music, Volume2, Disc, MicVocal, Zap } from 'lucide-react';
-import axios from 'axios';
 import { resolveImageUrl, handleImageError } from '../utils/imageUtils';
+import { fetchSiteData } from '../utils/siteData';
 
-const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
 const LOGO_URL = "https://customer-assets.emergentagent.com/job_audio-haven-21/artifacts/kjwts159_HOGWARTS%20%20white%20bg%20only%20logo%20.jpg";
 
 const iconMap = {
@@ -28,14 +27,10 @@ const HomePage = () => {
 
   const fetchData = async () => {
     try {
-      const [servicesRes, projectsRes, contentRes] = await Promise.all([
-        axios.get(`${API}/services`),
-        axios.get(`${API}/projects`),
-        axios.get(`${API}/settings/content`)
-      ]);
-      setServices(servicesRes.data);
-      setProjects(projectsRes.data.slice(0, 3));
-      setContent(contentRes.data);
+      const data = await fetchSiteData();
+      setServices(data.services);
+      setProjects(data.projects.slice(0, 3));
+      setContent(data.content);
     } catch (error) {
       console.error('Error fetching data:', error);
     }
@@ -196,7 +191,7 @@ const HomePage = () => {
                   {service.image_url && (
                     <div className="relative w-full h-40 rounded-2xl overflow-hidden mb-6 glass">
                       <img 
-                        src={resolveImageUrl(service.image_url, 'service')} 
+                        src={resolveImageUrl(service.image_url, 'service', 640)} 
                         alt={service.name}
                         className="w-full h-full object-cover group-hover:scale-105 transition-all duration-500"
                         onError={(e) => handleImageError(e, 'service')}
@@ -263,7 +258,7 @@ const HomePage = () => {
               >
                 {/* Project image */}
                 <img 
-                  src={resolveImageUrl(project.image_url, 'project')} 
+                  src={resolveImageUrl(project.image_url, 'project', 1280)} 
                   alt={project.name}
                   className="absolute inset-0 w-full h-full object-cover group-hover:scale-105 transition-all duration-700"
                   onError={(e) => handleImageError(e, 'project')}
@@ -1,10 +1,8 @@
 import { useEffect, useState } from 'react';
 import { motion } from 'framer-motion';
 import { Play, ExternalLink, Zap } from 'lucide-react';
-import axios from 'axios';
 import { resolveImageUrl, handleImageError } from '../utils/imageUtils';
-
-const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
+import { fetchSiteData } from '../utils/siteData';
 
 const ProjectsPage = () => {
   const [projects, setProjects] = useState([]);
@@ -19,8 +17,8 @@ const ProjectsPage = () => {
 
   const fetchProjects = async () => {
     try {
-      const response = await axios.get(`${API}/projects`);
-      setProjects(response.data);
+      const data = await fetchSiteData();
+      setProjects(data.projects);
     } catch (error) {
       console.error('Error fetching projects:', error);
     } finally {
@@ -30,8 +28,8 @@ const ProjectsPage = () => {
 
   const fetchContent = async () => {
     try {
-      const response = await axios.get(`${API}/settings/content`);
-      setContent(response.data);
+      const data = await fetchSiteData();
+      setContent(data.content);
     } catch (error) {
       console.error('Error fetching content:', error);
     }
@@ -134,7 +132,7 @@ const ProjectsPage = () => {
                     {/* Project Image */}
                     <div className="absolute inset-0">
                       <img 
-                        src={resolveImageUrl(project.image_url, 'project')} 
+                        src={resolveImageUrl(project.image_url, 'project', 1280)} 
                         alt={project.name}
                         className="w-full h-full object-cover group-hover:scale-105 transition-all duration-700"
                         onError={(e) => handleImageError(e, 'project')}
@@ -2,10 +2,8 @@ import { useEffect, useState } from 'react';
 import { Link } from 'react-router-dom';
 import { motion } from 'framer-motion';
 import { ArrowRight, Mic, MicVocal, Sliders, Music, Volume2, Disc, Zap } from 'lucide-react';
-import axios from 'axios';
 import { resolveImageUrl, handleImageError } from '../utils/imageUtils';
-
-const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
+import { fetchSiteData } from '../utils/siteData';
 
 const iconMap = {
   'mic': Mic,
@@ -28,8 +26,8 @@ const ServicesPage = () => {
 
   const fetchServices = async () => {
     try {
-      const response = await axios.get(`${API}/services`);
-      setServices(response.data);
+      const data = await fetchSiteData();
+      setServices(data.services);
     } catch (error) {
       console.error('Error fetching services:', error);
     } finally {
@@ -39,8 +37,8 @@ const ServicesPage = () => {
 
   const fetchContent = async () => {
     try {
-      const response = await axios.get(`${API}/settings/content`);
-      setContent(response.data);
+      const data = await fetchSiteData();
+      setContent(data.content);
     } catch (error) {
       console.error('Error fetching content:', error);
     }
@@ -109,7 +107,7 @@ const ServicesPage = () => {
                     {service.image_url && (
                       <div className="relative h-48 overflow-hidden">
                         <img 
-                          src={resolveImageUrl(service.image_url, 'service')} 
+                          src={resolveImageUrl(service.image_url, 'service', 640)} 
                           alt={service.name}
                           className="w-full h-full object-cover group-hover:scale-105 transition-all duration-700"
                           onError={(e) => handleImageError(e, 'service')}
@@ -9,18 +9,28 @@ const PLACEHOLDERS = {
   default: 'https://images.unsplash.com/photo-1511379938547-c1f69419868d?auto=format&fit=crop&q=80',
 };
 
+// Widths the backend renders resized variants for (see IMAGE_VARIANT_WIDTHS in server.py)
+const VARIANT_WIDTHS = [320, 640, 1280];
+
+const withWidth = (url, width) => {
+  if (!width) return url;
+  const w = VARIANT_WIDTHS.find((size) => size >= width) || VARIANT_WIDTHS[VARIANT_WIDTHS.length - 1];
+  return `${url}${url.includes('?') ? '&' : '?'}w=${w}`;
+};
+
 /**
  * Resolves an image URL to a proper absolute URL
  * Handles relative paths, old domain URLs, and missing images
+ * Pass a width to request a resized variant of uploaded images
  */
-export const resolveImageUrl = (url, type = 'default') => {
+export const resolveImageUrl = (url, type = 'default', width = null) => {
   if (!url) {
     return PLACEHOLDERS[type] || PLACEHOLDERS.default;
   }
 
   // If it's a relative path starting with /api/, prepend backend URL
   if (url.startsWith('/api/')) {
-    return `${BACKEND_URL}${url}`;
+    return withWidth(`${BACKEND_URL}${url}`, url.startsWith('/api/uploads/') ? width : null);
   }
 
   // If it's an Unsplash URL or other external URL, use as-is
@@ -31,7 +41,7 @@ export const resolveImageUrl = (url, type = 'default') => {
   // If it contains an old preview domain, try to extract the filename and rebuild
   const uploadMatch = url.match(/\/uploads\/([a-f0-9-]+\.[a-z]+)$/i);
   if (uploadMatch) {
-    return `${BACKEND_URL}/api/uploads/${uploadMatch[1]}`;
+    return withWidth(`${BACKEND_URL}/api/uploads/${uploadMatch[1]}`, width);
   }
 
   // Otherwise return as-is (might be a valid external URL)
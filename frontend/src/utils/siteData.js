@@ -0,0 +1,27 @@
+// Shared loader for the public site data (content, contact, settings, services, projects)
+
+import axios from 'axios';
+
+const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
+
+// Navbar, footer and page components all mount together, so they share one request.
+// Reused briefly across navigations; after that the browser revalidates it with its ETag.
+const MAX_AGE_MS = 30 * 1000;
+
+let pending = null;
+let fetchedAt = 0;
+
+/**
+ * Fetches /api/bootstrap once and shares the result between callers
+ * Resolves to { version, content, contact, settings, services, projects }
+ */
+export const fetchSiteData = () => {
+  if (!pending || Date.now() - fetchedAt > MAX_AGE_MS) {
+    fetchedAt = Date.now();
+    pending = axios.get(`${API}/bootstrap`).then((response) => response.data);
+    pending.catch(() => {
+      pending = null;
+    });
+  }
+  return pending;
+};
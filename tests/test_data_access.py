@@ -0,0 +1,32 @@
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_insert_document_returns_the_written_document(db):
+    doc = {"id": "s1", "name": "Mixing"}
+    result = await server.insert_document("services", doc)
+    assert result == {"id": "s1", "name": "Mixing"}
+    assert await db.services.find_one({"id": "s1"}, {"_id": 0}) == result
+
+
+async def test_set_document_fields_returns_before_and_after(db):
+    await db.services.insert_one({"id": "s1", "name": "Mixing", "price": None})
+    before, after = await server.set_document_fields("services", {"id": "s1"}, {"price": "100"})
+    assert before == {"id": "s1", "name": "Mixing", "price": None}
+    assert after == {"id": "s1", "name": "Mixing", "price": "100"}
+    assert await db.services.find_one({"id": "s1"}, {"_id": 0}) == after
+
+
+async def test_set_document_fields_without_match(db):
+    assert await server.set_document_fields("services", {"id": "missing"}, {"price": "100"}) == (None, None)
+    assert await db.services.count_documents({}) == 0
+
+
+async def test_set_document_fields_upsert_creates_the_document(db):
+    before, after = await server.set_document_fields("contact_info", {"id": "contact"}, {"phone": "1"}, upsert=True)
+    assert before is None
+    assert after == {"id": "contact", "phone": "1"}
+    assert await db.contact_info.find_one({"id": "contact"}, {"_id": 0}) == after
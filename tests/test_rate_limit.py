@@ -0,0 +1,55 @@
+import pytest
+from starlette.requests import Request
+
+import server
+
+
+def make_request(*forwarded, client="10.0.0.1"):
+    headers = [(b"x-forwarded-for", value.encode()) for value in forwarded]
+    return Request({"type": "http", "headers": headers, "client": (client, 1234)})
+
+
+class TestRetryAfter:
+    def test_full_current_window_waits_for_it_to_decay(self):
+        # 10 of 10 used with 30s left of a 60s window: 30s to roll over, then the new
+        # previous window still weighs 10 until it has slid out far enough
+        assert server.rate_limit_retry_after(previous=0, current=10, limit=10, window=60, elapsed=30) == 30
+
+    def test_over_limit_waits_longer(self):
+        assert server.rate_limit_retry_after(previous=0, current=20, limit=10, window=60, elapsed=30) == 60
+
+    def test_previous_window_sliding_out(self):
+        # 5 now, 10 before: needs (10 - 5) / 10 of the previous window gone, i.e. 30s into this one
+        assert server.rate_limit_retry_after(previous=10, current=5, limit=10, window=60, elapsed=10) == 20
+
+    def test_never_less_than_a_second(self):
+        assert server.rate_limit_retry_after(previous=10, current=5, limit=10, window=60, elapsed=59.9) == 1
+        assert server.rate_limit_retry_after(previous=0, current=10, limit=10, window=60, elapsed=60) == 1
+
+
+class TestClientIp:
+    @pytest.fixture(autouse=True)
+    def trust_proxy(self, monkeypatch):
+        monkeypatch.setattr(server, "TRUST_PROXY_HEADERS", True)
+        monkeypatch.setattr(server, "TRUSTED_PROXY_COUNT", 1)
+
+    def test_uses_entry_added_by_the_proxy(self):
+        assert server.client_ip(make_request("forged, 203.0.113.7")) == "203.0.113.7"
+
+    def test_multiple_headers_are_joined(self):
+        assert server.client_ip(make_request("forged", "203.0.113.7")) == "203.0.113.7"
+
+    def test_counts_trusted_proxies_from_the_right(self, monkeypatch):
+        monkeypatch.setattr(server, "TRUSTED_PROXY_COUNT", 2)
+        assert server.client_ip(make_request("forged, 203.0.113.7, 10.1.1.1")) == "203.0.113.7"
+
+    def test_short_header_falls_back_to_peer(self, monkeypatch):
+        monkeypatch.setattr(server, "TRUSTED_PROXY_COUNT", 2)
+        assert server.client_ip(make_request("203.0.113.7")) == "10.0.0.1"
+
+    def test_without_header(self):
+        assert server.client_ip(make_request()) == "10.0.0.1"
+
+    def test_header_ignored_unless_trusted(self, monkeypatch):
+        monkeypatch.setattr(server, "TRUST_PROXY_HEADERS", False)
+        assert server.client_ip(make_request("203.0.113.7")) == "10.0.0.1"
@@ -0,0 +1,54 @@
+import pytest
+from fastapi import HTTPException
+
+import server
+
+
+def test_no_selection_means_whole_document():
+    assert server.parse_sparse_fields(None) is None
+    assert server.parse_sparse_fields(" , ") is None
+
+
+def test_fields_are_deduplicated_and_sorted():
+    assert server.parse_sparse_fields("name, price,name") == ("name", "price")
+
+
+def test_sections_expand_to_their_fields():
+    fields = server.parse_sparse_fields("logo_url", sections="navbar")
+    assert "logo_url" in fields
+    assert set(server.SITE_CONTENT_SECTIONS["navbar"]) <= set(fields)
+
+
+def test_sections_cover_every_content_field():
+    covered = {name for names in server.SITE_CONTENT_SECTIONS.values() for name in names}
+    assert covered == set(server.SiteContentUpdate.model_fields)
+
+
+@pytest.mark.parametrize("fields", ["name,$where", "a.b", "1abc", "x" * 65])
+def test_invalid_field_names(fields):
+    with pytest.raises(HTTPException) as exc:
+        server.parse_sparse_fields(fields)
+    assert exc.value.status_code == 400
+
+
+def test_unknown_section():
+    with pytest.raises(HTTPException) as exc:
+        server.parse_sparse_fields(None, sections="nope")
+    assert exc.value.status_code == 400
+
+
+def test_too_many_fields():
+    names = ",".join(f"f{i}" for i in range(server.MAX_SPARSE_FIELDS + 1))
+    with pytest.raises(HTTPException):
+        server.parse_sparse_fields(names)
+
+
+def test_projection_always_includes_id():
+    assert server.sparse_projection(None) == {"_id": 0}
+    assert server.sparse_projection(("name",)) == {"_id": 0, "id": 1, "name": 1}
+
+
+def test_pick_fields():
+    doc = {"id": "1", "name": "Mixing", "price": None, "icon": "sliders"}
+    assert server.pick_fields(doc, None) is doc
+    assert server.pick_fields(doc, ("name", "missing")) == {"id": "1", "name": "Mixing"}
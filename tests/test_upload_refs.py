@@ -0,0 +1,36 @@
+import pytest
+from fastapi import HTTPException
+
+import server
+
+
+@pytest.mark.parametrize("filename, expected", [
+    ("photo.JPG", "jpg"),
+    ("archive.tar.gz", "gz"),
+    ("no_extension", "pdf"),
+    (None, "pdf"),
+])
+def test_upload_extension(filename, expected):
+    assert server.upload_extension(filename, "pdf") == expected
+
+
+@pytest.mark.parametrize("filename", ["resume.pdf/x", "resume.pdé", "a.abcdefghijk", "trailing."])
+def test_upload_extension_rejects_unsafe_names(filename):
+    with pytest.raises(HTTPException) as exc:
+        server.upload_extension(filename, "pdf")
+    assert exc.value.status_code == 400
+
+
+def test_url_fields_reference_uploads():
+    doc = {"image_url": "/api/uploads/abc.jpg?w=320", "logo_url": "https://cdn.example.com/api/uploads/logo.png", "name": "x"}
+    assert server.upload_filenames(doc) == {"abc.jpg", "logo.png"}
+
+
+def test_cv_filename_only_references_cvs():
+    assert server.upload_filenames({"cv_filename": "cv_abc.pdf"}) == {"cv_abc.pdf"}
+    assert server.upload_filenames({"cv_filename": "logo.png"}) == set()
+    assert server.upload_filenames({"cv_filename": "cv_abc.pdf/x"}) == set()
+
+
+def test_untrusted_url_fields_are_ignored():
+    assert server.upload_filenames({"portfolio_url": "https://example.com/api/uploads/logo.png"}) == set()
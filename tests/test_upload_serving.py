@@ -0,0 +1,103 @@
+import re
+from email.utils import formatdate
+
+import pytest
+from starlette.requests import Request
+
+import server
+
+
+def make_request(headers=None):
+    raw = [(key.lower().encode(), value.encode()) for key, value in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "query_string": b"", "headers": raw})
+
+
+class TestParseByteRanges:
+    def test_single_range(self):
+        assert server.parse_byte_ranges("bytes=0-9", 100) == [(0, 9)]
+
+    def test_open_ended_and_suffix(self):
+        assert server.parse_byte_ranges("bytes=90-", 100) == [(90, 99)]
+        assert server.parse_byte_ranges("bytes=-10", 100) == [(90, 99)]
+        assert server.parse_byte_ranges("bytes=-500", 100) == [(0, 99)]
+
+    def test_end_is_clamped_to_size(self):
+        assert server.parse_byte_ranges("bytes=50-1000", 100) == [(50, 99)]
+
+    def test_overlapping_and_adjacent_ranges_are_merged(self):
+        assert server.parse_byte_ranges("bytes=20-29,0-9,10-15,25-40", 100) == [(0, 15), (20, 40)]
+
+    def test_unsatisfiable(self):
+        assert server.parse_byte_ranges("bytes=100-200", 100) == []
+        assert server.parse_byte_ranges("bytes=-0", 100) == []
+
+    @pytest.mark.parametrize("header", ["items=0-9", "bytes=", "bytes=5", "bytes=a-b", "bytes=9-0"])
+    def test_ignored_headers(self, header):
+        assert server.parse_byte_ranges(header, 100) is None
+
+    def test_too_many_ranges_are_ignored(self):
+        spec = ",".join(f"{i * 2}-{i * 2}" for i in range(server.MAX_BYTE_RANGES + 1))
+        assert server.parse_byte_ranges(f"bytes={spec}", 1000) is None
+
+
+class TestNotModified:
+    etag = '"10-abc"'
+    mtime = 1_700_000_000.5
+
+    def test_matching_etag(self):
+        assert server.not_modified(make_request({"If-None-Match": self.etag}), self.etag, self.mtime)
+        assert server.not_modified(make_request({"If-None-Match": f'"x", W/{self.etag}'}), self.etag, self.mtime)
+        assert server.not_modified(make_request({"If-None-Match": "*"}), self.etag, self.mtime)
+
+    def test_etag_takes_precedence_over_date(self):
+        headers = {"If-None-Match": '"other"', "If-Modified-Since": formatdate(self.mtime + 60, usegmt=True)}
+        assert not server.not_modified(make_request(headers), self.etag, self.mtime)
+
+    def test_if_modified_since(self):
+        assert server.not_modified(make_request({"If-Modified-Since": formatdate(self.mtime, usegmt=True)}), self.etag, self.mtime)
+        assert not server.not_modified(make_request({"If-Modified-Since": formatdate(self.mtime - 60, usegmt=True)}), self.etag, self.mtime)
+
+    def test_unparseable_date(self):
+        assert not server.not_modified(make_request({"If-Modified-Since": "yesterday"}), self.etag, self.mtime)
+
+    def test_no_validators(self):
+        assert not server.not_modified(make_request(), self.etag, self.mtime)
+
+
+async def read_body(response) -> bytes:
+    return b"".join([chunk async for chunk in response.body_iterator])
+
+
+@pytest.mark.anyio
+async def test_single_range_response(tmp_path):
+    path = tmp_path / "file.bin"
+    path.write_bytes(bytes(range(256)))
+    response = await server.send_upload_file(make_request({"Range": "bytes=10-19"}), path)
+    body = await read_body(response)
+    assert response.status_code == 206
+    assert body == bytes(range(10, 20))
+    assert response.headers["content-range"] == "bytes 10-19/256"
+    assert int(response.headers["content-length"]) == len(body)
+
+
+@pytest.mark.anyio
+async def test_multipart_content_length_matches_body(tmp_path):
+    path = tmp_path / "file.bin"
+    path.write_bytes(bytes(range(256)) * 4)
+    response = await server.send_upload_file(make_request({"Range": "bytes=0-9,100-199,-5"}), path)
+    body = await read_body(response)
+    assert response.status_code == 206
+    assert int(response.headers["content-length"]) == len(body)
+    boundary = re.search(r"boundary=(\w+)", response.headers["content-type"]).group(1)
+    assert body.startswith(f"--{boundary}\r\n".encode())
+    assert body.endswith(f"\r\n--{boundary}--\r\n".encode())
+    assert body.count(b"Content-Range: bytes ") == 3
+
+
+@pytest.mark.anyio
+async def test_unsatisfiable_range(tmp_path):
+    path = tmp_path / "file.bin"
+    path.write_bytes(b"x" * 10)
+    response = await server.send_upload_file(make_request({"Range": "bytes=20-30"}), path)
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */10"